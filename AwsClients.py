@@ -0,0 +1,79 @@
+import threading
+
+import boto3
+from botocore.config import Config
+
+# Client configuration – adjust as needed
+MAX_POOL_CONNECTIONS = 64   # HTTP connections per client; keep above the threads sharing it
+RETRY_MODE = 'standard'     # 'legacy', 'standard' or 'adaptive'
+MAX_ATTEMPTS = 10           # Attempts per request, including the first
+CONNECT_TIMEOUT = 5         # Seconds
+READ_TIMEOUT = 60           # Seconds
+
+_session = None
+_clients = {}
+_resources = {}
+_lock = threading.Lock()
+
+def client_config():
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        retries={"mode": RETRY_MODE, "max_attempts": MAX_ATTEMPTS},
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT
+    )
+
+def get_session():
+    """The boto3 session every client and resource in this process is built from."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = boto3.session.Session()
+        return _session
+
+def get_client(service, region_name=None):
+    """Return the shared low-level client for a service and region, creating it on first use."""
+    key = (service, region_name)
+    if key not in _clients:
+        session = get_session()
+        with _lock:
+            if key not in _clients:
+                _clients[key] = session.client(service, region_name=region_name, config=client_config())
+    return _clients[key]
+
+def get_resource(service, region_name=None):
+    """Return the shared resource for a service and region, creating it on first use."""
+    key = (service, region_name)
+    if key not in _resources:
+        session = get_session()
+        with _lock:
+            if key not in _resources:
+                _resources[key] = session.resource(service, region_name=region_name, config=client_config())
+    return _resources[key]
+
+class _Lazy:
+    """
+    Stand-in for a client or Table that builds the real object on first
+    attribute access, so importing a migration creates no AWS objects and
+    needs no credentials.
+    """
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+        self._target_lock = threading.Lock()
+
+    def _resolve(self):
+        if self._target is None:
+            with self._target_lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+def lazy_client(service, region_name=None):
+    return _Lazy(lambda: get_client(service, region_name))
+
+def lazy_table(table_name, region_name=None):
+    return _Lazy(lambda: get_resource("dynamodb", region_name).Table(table_name))
@@ -0,0 +1,260 @@
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from Instrumentation import carry_metrics, metrics
+from RateController import consumed_units
+
+# Writer configuration – adjust as needed
+DEFAULT_WRITE_WORKERS = 4   # BatchWriteItem requests kept in flight at once
+BATCH_SIZE = 25             # DynamoDB's limit on requests per BatchWriteItem
+MAX_RETRIES = 10            # Attempts at resending UnprocessedItems before giving up
+BACKOFF_BASE = 0.05         # Seconds; doubled on every retry
+BACKOFF_CAP = 5.0           # Upper bound of a single backoff sleep
+SPREAD_WINDOW = 5000        # Items a PartitionSpreader buffers and interleaves before batching
+HOT_KEY_BATCH_ITEMS = 5     # Items per batch for a partition key that has been throttled
+
+def _key_part(value):
+    # Key values in DynamoDB JSON ({"S": "x"}) are dicts; make them hashable
+    return tuple(value.items()) if isinstance(value, dict) else value
+
+class UnprocessedItemsError(Exception):
+    """Raised when DynamoDB keeps returning UnprocessedItems after every retry."""
+
+class ConcurrentBatchWriter:
+    """
+    Replacement for Table.batch_writer() that keeps several BatchWriteItem
+    requests in flight and resends UnprocessedItems with jittered exponential
+    backoff. Like batch_writer(overwrite_by_pkeys=...), a put or delete whose
+    key is already waiting in the buffer replaces the earlier one, so one request
+    never carries two items with the same key; puts of one key that land in
+    different batches may be applied in either order. Use it as a context manager;
+    leaving the block waits until every item is written.
+    With a CapacityController, each request waits for a slot, reports its
+    consumed write capacity and signals throttling when items come back
+    unprocessed.
+    """
+    def __init__(self, table, max_workers=DEFAULT_WRITE_WORKERS, overwrite_by_pkeys=None, controller=None):
+        self.table = table
+        self.controller = controller
+        self.client = table.meta.client
+        if overwrite_by_pkeys is None:
+            overwrite_by_pkeys = [key["AttributeName"] for key in table.key_schema]
+        self.overwrite_by_pkeys = overwrite_by_pkeys
+        self.max_workers = max_workers
+        self._buffer = {}
+        self._pool = None
+        self._futures = []
+        # Bounds the batches queued behind the workers so memory stays flat
+        self._slots = threading.BoundedSemaphore(max_workers * 2)
+        # Batches are written on pool threads but counted for the migration opening the writer
+        self._write = carry_metrics(self._write_batch)
+
+    def __enter__(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="write")
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def put_item(self, Item):
+        self._add(Item, {"PutRequest": {"Item": Item}})
+
+    def delete_item(self, Key):
+        self._add(Key, {"DeleteRequest": {"Key": Key}})
+
+    def _add(self, item, request):
+        key = tuple(_key_part(item.get(name)) for name in self.overwrite_by_pkeys)
+        self._buffer[key] = request
+        if len(self._buffer) >= BATCH_SIZE:
+            self._submit_buffer()
+
+    def _submit_buffer(self):
+        requests = list(self._buffer.values())
+        self._buffer = {}
+        self._submit(requests)
+
+    def _submit(self, requests):
+        self._raise_failures()
+        self._slots.acquire()
+        future = self._pool.submit(self._write, requests)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _raise_failures(self):
+        # Surface the first failed batch and drop finished futures
+        pending = []
+        for future in self._futures:
+            if not future.done():
+                pending.append(future)
+            elif future.exception():
+                raise future.exception()
+        self._futures = pending
+
+    def _write_batch(self, request):
+        for attempt in range(MAX_RETRIES + 1):
+            response = self._send(request)
+            sent = len(request)
+            request = response.get("UnprocessedItems", {}).get(self.table.name, [])
+            metrics.count("write", sent - len(request))
+            if not request:
+                return
+            self._on_unprocessed(request)
+            if self.controller:
+                self.controller.throttled()
+            # Full jitter keeps throttled workers from retrying in lockstep
+            time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+        raise UnprocessedItemsError(
+            f"{len(request)} requests still unprocessed by {self.table.name} after {MAX_RETRIES} retries"
+        )
+
+    def _on_unprocessed(self, requests):
+        """Called with the requests a BatchWriteItem left unprocessed, before they are resent."""
+
+    def _send(self, request):
+        if self.controller is None:
+            with metrics.timer("write"):
+                return self.client.batch_write_item(RequestItems={self.table.name: request})
+        self.controller.acquire()
+        consumed = 0
+        try:
+            with metrics.timer("write"):
+                response = self.client.batch_write_item(
+                    RequestItems={self.table.name: request},
+                    ReturnConsumedCapacity="TOTAL"
+                )
+            consumed = consumed_units(response)
+            return response
+        finally:
+            self.controller.release(consumed)
+
+    def flush(self):
+        """Send any buffered items and wait for every in-flight request."""
+        if self._buffer:
+            self._submit_buffer()
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+def _request_item(request):
+    return request["PutRequest"]["Item"] if "PutRequest" in request else request["DeleteRequest"]["Key"]
+
+class PartitionSpreader:
+    """
+    Write scheduling for tables whose items arrive in runs sharing a partition
+    key (such as one user's actions in scan order). Writers made by writer()
+    buffer up to window items and deal them out round-robin across partition
+    key values, so each BatchWriteItem spans many partitions instead of
+    landing a burst on one. Requests that come back unprocessed are counted
+    per partition key; a key that has been throttled only fills the space
+    cold keys leave in a batch, at most hot_key_items items per batch, so it
+    keeps draining at a capped rate and its retries no longer hold up
+    everyone else's writes.
+    One spreader lasts the whole run, keeping its throttling counts across
+    checkpoint windows.
+    """
+    def __init__(self, partition_key, window=SPREAD_WINDOW, hot_key_items=HOT_KEY_BATCH_ITEMS):
+        self.partition_key = partition_key
+        self.window = window
+        self.hot_key_items = hot_key_items
+        self.throttled = Counter()
+        self.batches = 0
+        self.batch_keys = 0
+        self._lock = threading.Lock()
+
+    def writer(self, table, max_workers=DEFAULT_WRITE_WORKERS, controller=None):
+        """Open a writer for one window of items; use it like a ConcurrentBatchWriter."""
+        return _SpreadingWriter(self, table, max_workers, controller)
+
+    def partition_value(self, item):
+        return _key_part(item.get(self.partition_key))
+
+    def record_unprocessed(self, requests):
+        with self._lock:
+            for request in requests:
+                self.throttled[self.partition_value(_request_item(request))] += 1
+        metrics.count("write_throttled", len(requests))
+
+    def batches_for(self, groups):
+        """
+        Split {partition value: [request, ...]} into batches, taking one
+        request per key in turn and capping throttled keys per batch.
+        """
+        with self._lock:
+            hot = {key for key in groups if self.throttled[key]}
+        queues = deque((key, deque(requests)) for key, requests in groups.items() if key not in hot)
+        held = deque((key, deque(requests)) for key, requests in groups.items() if key in hot)
+        batches = []
+        while queues or held:
+            batch, keys = [], set()
+            # Every cold key gives one request per round; hot keys fill in up to their cap
+            while queues and len(batch) < BATCH_SIZE:
+                key, requests = queues.popleft()
+                batch.append(requests.popleft())
+                keys.add(key)
+                if requests:
+                    queues.append((key, requests))
+            for key, requests in held:
+                take = min(self.hot_key_items, BATCH_SIZE - len(batch), len(requests))
+                if take > 0:
+                    batch.extend(requests.popleft() for _ in range(take))
+                    keys.add(key)
+            held = deque((key, requests) for key, requests in held if requests)
+            batches.append(batch)
+            with self._lock:
+                self.batches += 1
+                self.batch_keys += len(keys)
+        return batches
+
+    def summary(self):
+        average = self.batch_keys / self.batches if self.batches else 0
+        text = f"{self.batches} batches spanning {average:.1f} partition keys on average"
+        if self.throttled:
+            hottest = ", ".join(f"{_key_text(key)} ({count})" for key, count in self.throttled.most_common(3))
+            text += (f"; {sum(self.throttled.values())} throttled requests across "
+                     f"{len(self.throttled)} keys, hottest {hottest}")
+        return text
+
+def _key_text(key):
+    # (("S", "user-1"),) from DynamoDB JSON, or the plain value
+    if isinstance(key, tuple) and len(key) == 1:
+        return str(key[0][1])
+    return str(key)
+
+class _SpreadingWriter(ConcurrentBatchWriter):
+    """ConcurrentBatchWriter that hands batching to a PartitionSpreader."""
+    def __init__(self, spreader, table, max_workers, controller):
+        super().__init__(table, max_workers, controller=controller)
+        self.spreader = spreader
+        self._groups = {}
+        self._buffered = 0
+
+    def _add(self, item, request):
+        key = tuple(_key_part(item.get(name)) for name in self.overwrite_by_pkeys)
+        group = self._groups.setdefault(self.spreader.partition_value(item), {})
+        if key not in group:
+            self._buffered += 1
+        group[key] = request
+        if self._buffered >= self.spreader.window:
+            self._spread()
+
+    def _spread(self):
+        groups = {key: list(requests.values()) for key, requests in self._groups.items()}
+        self._groups = {}
+        self._buffered = 0
+        for batch in self.spreader.batches_for(groups):
+            self._submit(batch)
+
+    def _on_unprocessed(self, requests):
+        self.spreader.record_unprocessed(requests)
+
+    def flush(self):
+        if self._groups:
+            self._spread()
+        super().flush()
@@ -0,0 +1,443 @@
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+
+import boto3
+
+from TranslationLimiter import TranslationLimiter
+
+# Benchmark configuration – adjust as needed
+DEFAULT_ITEMS = 1000          # Synthetic items generated per source table
+DEFAULT_ITEM_SIZE = 1         # Multiplier for text lengths and list sizes in generated items
+TRANSLATE_LATENCY = 0.02      # Seconds the fake Translate spends on each call
+REGRESSION_TOLERANCE = 0.2    # Items/sec drop (vs --compare results) reported as a regression
+SEED = 7
+
+WORDS = (
+    "casa perro gato libro agua tiempo ciudad amigo escuela familia trabajo comida "
+    "house dog cat book water time city friend school family work food travel music "
+    "learn speak listen read write answer question lesson story morning evening"
+).split()
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def _url(rng, kind):
+    return f"https://cdn.example.com/{kind}/{rng.getrandbits(48):012x}"
+
+def generate_user(i, size, rng):
+    return {
+        "Identifier": f"user-{i:08d}",
+        "Email": f"user{i}@example.com",
+        "Account_Creation_Date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "Birthday": f"19{rng.randint(60, 99)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "Commitment_Level": rng.choice(["Casual", "Regular", "Serious"]),
+        "Country": rng.choice(["US", "MX", "ES", "AR"]),
+        "DailyAvailability": Decimal(rng.randint(5, 60)),
+        "Device_Information": {"OS": rng.choice(["iOS", "Android"]), "Version": f"{rng.randint(10, 17)}.{rng.randint(0, 9)}"},
+        "FCM_Token": f"{rng.getrandbits(128):032x}",
+        "First_Name": rng.choice(WORDS).title(),
+        "Last_Name": rng.choice(WORDS).title(),
+        "Gender": rng.choice(["F", "M", "X"]),
+        "Preffered_Language": "EN",
+        "Profile_Picture": _url(rng, "profiles"),
+        "Role": "Student",
+        "Streak": Decimal(rng.randint(0, 400)),
+        "Subscription_Status": rng.choice([True, False]),
+        "Time_Zone": "America/New_York",
+        "Usage_Metrics": {f"metric_{m}": Decimal(rng.randint(0, 10000)) for m in range(5 * size)},
+        "User_Preferences": {"Notifications": True, "Theme": rng.choice(["Light", "Dark"])},
+        "Last_Login": Decimal(1700000000 + rng.randint(0, 10000000)),
+        "Lives": Decimal(rng.randint(0, 5)),
+        "Location": rng.choice(["New York", "Madrid", "Lima"]),
+        "Motivations": [rng.choice(WORDS) for _ in range(3)],
+        "Current_Section": Decimal(rng.randint(1, 40)),
+        "Current_Lesson": Decimal(rng.randint(1, 12))
+    }
+
+def generate_section(i, size, rng):
+    lessons = []
+    for n in range(10 * size):
+        lesson_type = rng.choice(["PhotoList", "Vocab", "Passage", "Quiz"])
+        images = [{"URL": _url(rng, "lessons")} for _ in range(rng.randint(0, 3))]
+        lessons.append({
+            "Type": lesson_type,
+            "Title": _text(rng, 4),
+            "Content": _text(rng, 40 * size),
+            "ImageInfo": {"ImageObjects": images if images else "[]"}
+        })
+    return {"Identifier": f"section-{i:08d}", "Lessons": lessons}
+
+def generate_course(i, size, rng):
+    return {
+        "Identifier": f"course-{i:08d}",
+        "City": rng.choice(["Madrid", "Lima", "Bogota", "Mexico City"]),
+        "Country": rng.choice(["ES", "PE", "CO", "MX"]),
+        "Description": _text(rng, 30 * size),
+        "Images": [{"URL": _url(rng, "courses"), "Alt": _text(rng, 3)} for _ in range(3 * size)],
+        "Vocabulary_List": _text(rng, 20 * size)
+    }
+
+def generate_passage(i, size, rng):
+    item = {
+        "Identifier": f"passage-{i:08d}",
+        "Level": rng.choice(["A1", "A2", "B1", "B2"]),
+        "Genre": rng.choice(["Story", "News", "Dialogue"]),
+        "#name": _text(rng, 4),
+        "Description": _text(rng, 20 * size),
+        "Passage": _text(rng, 120 * size),
+        "Passage_Word_Timings": [{"Word": rng.choice(WORDS), "Start": str(n / 4)} for n in range(30 * size)],
+        "Passage_Audio_URL": _url(rng, "audio"),
+        "ImageUrl": _url(rng, "passages"),
+        "Prompt": _text(rng, 10)
+    }
+    for n in range(1, 5):
+        item[f"Question_{n}"] = _text(rng, 8)
+        item[f"Answer_{n}"] = _text(rng, 3)
+        item[f"Options_{n}"] = [_text(rng, 2) for _ in range(4)]
+    return item
+
+def generate_trivia(i, size, rng):
+    return {
+        "identifier": f"trivia-{i:08d}",
+        "level": rng.choice(["A1", "A2", "B1", "B2"]),
+        "question": _text(rng, 10 * size),
+        "answer": rng.choice(WORDS),
+        "options": [rng.choice(WORDS) for _ in range(4)],
+        "imageUrl": _url(rng, "trivia")
+    }
+
+def generate_vocab(i, size, rng):
+    return {
+        "Identifier": f"vocab-{i:08d}",
+        "Level": rng.choice(["A1", "A2", "B1", "B2"]),
+        "EnglishWord": rng.choice(WORDS),
+        "EnglishOptions": [rng.choice(WORDS) for _ in range(4)],
+        "SpanishWord": rng.choice(WORDS),
+        "SpanishOptions": [rng.choice(WORDS) for _ in range(4)],
+        "Explanation_Word_Timing": _text(rng, 10 * size),
+        "Phonetic_Transcription": _text(rng, 2),
+        "Pronunciation_Explanation": _text(rng, 30 * size),
+        "Pronunciation_Explanation_Audio": _url(rng, "audio"),
+        "Syllables": [rng.choice(WORDS)[:3] + " " for _ in range(3)],
+        "Syllable_Sounds": [{"Syllable": rng.choice(WORDS)[:3], "Audio": _url(rng, "audio")} for _ in range(3)],
+        "Word_Audio": _url(rng, "audio"),
+        "ImageUrl": _url(rng, "vocab")
+    }
+
+def generate_notification(i, size, rng):
+    return {
+        "Identifier": f"notification-{i:08d}",
+        "Language": "EN",
+        "Type": rng.choice(["Reminder", "Promo", "Streak"]),
+        "Title": _text(rng, 5),
+        "Body": _text(rng, 25 * size),
+        "Date_Started": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "Date_Retired": "",
+        "isActive": rng.choice([True, False]),
+        "Use_Case": rng.choice(["Engagement", "Billing"])
+    }
+
+def generate_metric(i, size, rng):
+    # Events cluster on a few users, like the real userActions table
+    return {
+        "event_id": f"event-{i:010d}",
+        "user_id": f"user-{rng.randint(0, 49):08d}",
+        "timestamp": Decimal(1700000000000 + i),
+        "event": rng.choice(["lesson_start", "lesson_end", "answer", "login"]),
+        "device_id": f"{rng.getrandbits(64):016x}",
+        "event_detail": _text(rng, 5 * size),
+        "event_detail_2": _text(rng, 2),
+        "event_detail_3": "",
+        "event_type": rng.choice(["ui", "system"]),
+        "location_id": rng.choice(["home", "lesson", "review"]),
+        "section": Decimal(rng.randint(1, 40)),
+        "section_level": rng.choice(["A1", "A2", "B1"]),
+        "session_id": f"{rng.getrandbits(64):016x}"
+    }
+
+# name: (module, source/target table name constants, source and target key schemas, generator)
+BENCHMARKS = {
+    "User": {
+        "module": "UserMigration", "source": "OLD_TABLE_NAME", "target": "NEW_TABLE_NAME",
+        "source_key": [("Identifier", "S")], "target_key": [("Identifier", "S")],
+        "generate": generate_user
+    },
+    "Section": {
+        "module": "SectionMigration", "source": "SOURCE_TABLE_NAME", "target": "TARGET_TABLE_NAME",
+        "source_key": [("Identifier", "S")], "target_key": [("Identifier", "S")],
+        "generate": generate_section
+    },
+    "Course": {
+        "module": "CourseMigration", "source": "SOURCE_TABLE_NAME", "target": "TARGET_TABLE_NAME",
+        "source_key": [("Identifier", "S")], "target_key": [("Identifier", "S")],
+        "generate": generate_course
+    },
+    "Passage": {
+        "module": "PassageMigration", "source": "SOURCE_TABLE_NAME", "target": "TARGET_TABLE_NAME",
+        "source_key": [("Identifier", "S")], "target_key": [("Identifier", "S")],
+        "generate": generate_passage
+    },
+    "Trivia": {
+        "module": "TriviaMigration", "source": "SOURCE_TABLE_NAME", "target": "TARGET_TABLE_NAME",
+        "source_key": [("identifier", "S")], "target_key": [("identifier", "S")],
+        "generate": generate_trivia
+    },
+    "Vocab": {
+        "module": "VocabMigration", "source": "SOURCE_TABLE_NAME", "target": "TARGET_TABLE_NAME",
+        "source_key": [("Identifier", "S")], "target_key": [("Identifier", "S")],
+        "generate": generate_vocab
+    },
+    "Notification": {
+        "module": "NotificationMigration", "source": "SOURCE_TABLE_NAME", "target": "TARGET_TABLE_NAME",
+        "source_key": [("Identifier", "S")], "target_key": [("Identifier", "S")],
+        "generate": generate_notification
+    },
+    "Metric": {
+        "module": "MetricMigration", "source": "SOURCE_TABLE_NAME", "target": "TARGET_TABLE_NAME",
+        "source_key": [("event_id", "S")], "target_key": [("user_id", "S"), ("timestamp", "N")],
+        "generate": generate_metric
+    }
+}
+
+class FakeTranslate:
+    """
+    In-process stand-in for the AWS Translate client: every call sleeps for
+    latency seconds and returns the text tagged with the target language.
+    """
+    def __init__(self, latency=TRANSLATE_LATENCY):
+        self.latency = latency
+        self.calls = 0
+        self.characters = 0
+        self._lock = threading.Lock()
+
+    def translate_text(self, Text, SourceLanguageCode, TargetLanguageCode, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.characters += len(Text)
+        if self.latency:
+            time.sleep(self.latency)
+        # Tag every paragraph, as Translate keeps paragraph breaks (see TranslationBatcher)
+        return {"TranslatedText": "\n\n".join(f"[{TargetLanguageCode}] {part}" for part in Text.split("\n\n"))}
+
+class LatencyRecorder:
+    """
+    Per-item latency: time from the item's scan page reaching the pipeline
+    to the item being handed to the batch writer. Items are migrated in the
+    order their pages are consumed, so each on_migrated call belongs to the
+    oldest page that still has items outstanding.
+    """
+    def __init__(self):
+        self.latencies = []
+        self._arrivals = deque()
+        self._remaining = 0
+        self._arrived = None
+
+    def pages(self, pages):
+        for page in pages:
+            self._arrivals.append((len(page), time.perf_counter()))
+            yield page
+
+    def migrated(self):
+        now = time.perf_counter()
+        while self._remaining == 0:
+            self._remaining, self._arrived = self._arrivals.popleft()
+        self._remaining -= 1
+        self.latencies.append(now - self._arrived)
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _create_table(dynamodb, name, key):
+    return dynamodb.create_table(
+        TableName=name,
+        KeySchema=[{"AttributeName": attr, "KeyType": kind} for (attr, _), kind in zip(key, ["HASH", "RANGE"])],
+        AttributeDefinitions=[{"AttributeName": attr, "AttributeType": attr_type} for attr, attr_type in key],
+        BillingMode="PAY_PER_REQUEST"
+    )
+
+def _count_items(table):
+    count, kwargs = 0, {"Select": "COUNT"}
+    while True:
+        response = table.scan(**kwargs)
+        count += response["Count"]
+        if "LastEvaluatedKey" not in response:
+            return count
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def run_benchmark(name, items=DEFAULT_ITEMS, item_size=DEFAULT_ITEM_SIZE, translate_latency=TRANSLATE_LATENCY):
+    """
+    Seed a synthetic source table in moto, run the migration's migrate_items()
+    against it and return its measurements. Runs in a scratch directory so
+    checkpoints and the translation cache start empty; meant to be called in
+    a fresh process (see main) so peak RSS belongs to this migration alone.
+    """
+    from moto import mock_aws
+
+    spec = BENCHMARKS[name]
+    for variable in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(variable, "benchmark")
+
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as workdir, mock_aws():
+        os.chdir(workdir)
+        module = importlib.import_module(spec["module"])
+        dynamodb = boto3.resource("dynamodb", region_name=module.REGION)
+        source = _create_table(dynamodb, getattr(module, spec["source"]), spec["source_key"])
+        target = _create_table(dynamodb, getattr(module, spec["target"]), spec["target_key"])
+
+        rng = random.Random(SEED)
+        with source.batch_writer() as batch:
+            for i in range(items):
+                batch.put_item(Item=spec["generate"](i, item_size, rng))
+        seeded_rss = _peak_rss_mb()
+
+        translate = FakeTranslate(translate_latency)
+        if hasattr(module, "translate"):
+            module.translate = translate
+        if hasattr(module, "translation_limiter"):
+            # Measure the pipeline, not the account's Translate quota
+            module.translation_limiter = TranslationLimiter(10 ** 6, 10 ** 9)
+
+        # Time items from the scan page they arrive in to their write. Migrations run
+        # through MigrationPipeline.run_migration, which looks both functions up there.
+        recorder = LatencyRecorder()
+        pipeline = importlib.import_module("MigrationPipeline")
+        scan, migrate = pipeline.parallel_scan, pipeline.migrate_pages
+        pipeline.parallel_scan = lambda *args, **kwargs: recorder.pages(scan(*args, **kwargs))
+
+        def timed_migrate_pages(*args, on_migrated=None, **kwargs):
+            def timed_on_migrated(count, item, new_item):
+                recorder.migrated()
+                if on_migrated:
+                    on_migrated(count, item, new_item)
+            return migrate(*args, on_migrated=timed_on_migrated, **kwargs)
+        pipeline.migrate_pages = timed_migrate_pages
+
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            module.migrate_items()
+        elapsed = time.perf_counter() - start
+
+        migrated = _count_items(target)
+        stages = importlib.import_module("Instrumentation").metrics.to_json()["stages"]
+        if migrated != items:
+            raise RuntimeError(f"{name}: expected {items} migrated items, found {migrated}")
+
+    return {
+        "migration": name,
+        "items": items,
+        "item_size": item_size,
+        "seconds": round(elapsed, 3),
+        "items_per_second": round(items / elapsed, 1),
+        "p50_ms": round(percentile(recorder.latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(recorder.latencies, 99) * 1000, 2),
+        "peak_rss_mb": round(max(_peak_rss_mb(), _peak_rss_mb(resource.RUSAGE_CHILDREN)), 1),
+        "seeded_rss_mb": round(seeded_rss, 1),
+        "translate_calls": translate.calls,
+        "translate_characters": translate.characters,
+        "stages": {stage: {"p50_ms": round(s["p50_ms"], 2), "p99_ms": round(s["p99_ms"], 2)}
+                   for stage, s in stages.items()}
+    }
+
+def print_results(results, baseline=None):
+    print(f"{'Migration':<14}{'Items':>8}{'Seconds':>10}{'Items/s':>10}{'p50 ms':>10}"
+          f"{'p99 ms':>10}{'RSS MB':>9}{'Translate':>11}")
+    for result in results:
+        line = (f"{result['migration']:<14}{result['items']:>8}{result['seconds']:>10}"
+                f"{result['items_per_second']:>10}{result['p50_ms']:>10}{result['p99_ms']:>10}"
+                f"{result['peak_rss_mb']:>9}{result['translate_calls']:>11}")
+        previous = (baseline or {}).get(result["migration"])
+        if previous:
+            change = result["items_per_second"] / previous["items_per_second"] - 1
+            line += f"   {change:+.0%} vs baseline"
+        print(line)
+        # Per-stage p50/p99 shows which stage a slowdown comes from
+        stages = " | ".join(f"{stage} {s['p50_ms']}/{s['p99_ms']}ms" for stage, s in result.get("stages", {}).items())
+        if stages:
+            print(f"{'':<14}{stages}")
+
+def find_regressions(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Return the migrations whose items/sec fell more than tolerance below the baseline run."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["migration"])
+        if previous and result["items_per_second"] < previous["items_per_second"] * (1 - tolerance):
+            regressions.append(result["migration"])
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the migrations against synthetic tables in a local DynamoDB "
+                    "stand-in (moto) with a fake Translate client."
+    )
+    parser.add_argument("migrations", nargs="*", metavar="MIGRATION",
+                        help=f"Migrations to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEMS, help="Items per source table")
+    parser.add_argument("--item-size", type=int, default=DEFAULT_ITEM_SIZE,
+                        help="Multiplier for text lengths and list sizes in generated items")
+    parser.add_argument("--translate-latency", type=float, default=TRANSLATE_LATENCY,
+                        help="Seconds each fake Translate call takes")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Results file from an earlier run; exit 1 on a throughput regression")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = [name for name in args.migrations if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown migration(s): {', '.join(unknown)}")
+
+    if args.run:
+        # Child process: run one benchmark and report it as the last line of output
+        print(json.dumps(run_benchmark(args.run, args.items, args.item_size, args.translate_latency)))
+        return
+
+    results = []
+    for name in args.migrations or BENCHMARKS:
+        print(f"Benchmarking {name} ({args.items} items)...", flush=True)
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run", name, "--items", str(args.items),
+             "--item-size", str(args.item_size), "--translate-latency", str(args.translate_latency)],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if child.returncode != 0:
+            print(child.stderr)
+            sys.exit(f"Benchmark for {name} failed.")
+        results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result["migration"]: result for result in json.load(f)}
+
+    print()
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline:
+        regressions = find_regressions(results, baseline)
+        if regressions:
+            sys.exit(f"Throughput regression (more than {REGRESSION_TOLERANCE:.0%} slower): {', '.join(regressions)}")
+
+if __name__ == "__main__":
+    main()
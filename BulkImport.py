@@ -0,0 +1,106 @@
+import base64
+import glob
+import gzip
+import itertools
+import json
+import os
+
+from boto3.dynamodb.types import Binary, TypeSerializer
+
+from Instrumentation import metrics
+
+# Bulk import configuration – adjust as needed
+DEFAULT_SHARDS = 4   # Import files written per checkpoint window
+GZIP_LEVEL = 6       # zlib compression level for the import files
+
+serializer = TypeSerializer()
+
+def _json_default(value):
+    # DynamoDB JSON carries binary values base64-encoded
+    if isinstance(value, Binary):
+        value = value.value
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class BulkImportSink:
+    """
+    Output for an initial load: instead of BatchWriteItem calls, items are
+    written to gzipped DynamoDB JSON files ({"Item": {...}} per line) that
+    ImportTable can load into a new table (InputFormat DYNAMODB_JSON,
+    InputCompressionType GZIP). Files go to <directory>/<table name>/data/.
+    With wire=True, items are already DynamoDB JSON (e.g. from
+    transform_wire_item) and are written as they are.
+    Unless resume is set (the run continues from a checkpoint), files from
+    an earlier load are removed first so no item is imported twice.
+    """
+    def __init__(self, directory, table_name, shards=DEFAULT_SHARDS, wire=False, resume=False):
+        self.data_dir = os.path.join(directory, table_name, "data")
+        self.table_name = table_name
+        self.shards = shards
+        self.wire = wire
+        self.items_written = 0
+        self.bytes_written = 0
+        os.makedirs(self.data_dir, exist_ok=True)
+        # Files a crashed run never finished hold items its checkpoint did not record
+        for leftover in glob.glob(os.path.join(self.data_dir, "*.tmp")):
+            os.remove(leftover)
+        if not resume:
+            for previous in glob.glob(os.path.join(self.data_dir, "part-*.json.gz")):
+                os.remove(previous)
+        # A resumed run adds files after the ones already written
+        existing = [int(os.path.basename(path)[len("part-"):-len(".json.gz")])
+                    for path in glob.glob(os.path.join(self.data_dir, "part-*.json.gz"))]
+        self._sequence = itertools.count(max(existing, default=-1) + 1)
+
+    def writer(self):
+        """Open a writer for one window of items; use it like a ConcurrentBatchWriter."""
+        return _ImportWindow(self)
+
+    def summary(self):
+        return (f"{self.items_written} items in {self.bytes_written / 1024 / 1024:.1f} MB of import files "
+                f"under {self.data_dir}")
+
+class _ImportWindow:
+    """
+    One window's import files, written as .tmp and renamed only when the
+    window closes cleanly, so a checkpoint never covers a file that was not
+    completely written and a failed window leaves nothing behind.
+    """
+    def __init__(self, sink):
+        self.sink = sink
+        self._files = []
+        self._paths = []
+        self._next_shard = itertools.cycle(range(sink.shards))
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def _file(self, shard):
+        while len(self._files) <= shard:
+            path = os.path.join(self.sink.data_dir, f"part-{next(self.sink._sequence):06d}.json.gz.tmp")
+            self._paths.append(path)
+            self._files.append(gzip.open(path, "wt", encoding="utf-8", compresslevel=GZIP_LEVEL))
+        return self._files[shard]
+
+    def put_item(self, Item):
+        if not self.sink.wire:
+            Item = {k: serializer.serialize(v) for k, v in Item.items()}
+        self._file(next(self._next_shard)).write(
+            json.dumps({"Item": Item}, ensure_ascii=False, separators=(",", ":"), default=_json_default) + "\n"
+        )
+        self._count += 1
+
+    def __exit__(self, exc_type, exc_value, tb):
+        for f in self._files:
+            f.close()
+        if exc_type is not None:
+            for path in self._paths:
+                os.remove(path)
+            return
+        for path in self._paths:
+            os.replace(path, path[:-len(".tmp")])
+            self.sink.bytes_written += os.path.getsize(path[:-len(".tmp")])
+        self.sink.items_written += self._count
+        metrics.count("write", self._count)
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+# Checkpoint configuration – adjust as needed
+CHECKPOINT_DIR = 'checkpoints'   # Local directory holding one JSON file per migration
+PAGES_PER_CHECKPOINT = 10        # Scan pages written between checkpoint saves
+
+# Keys are stored in DynamoDB JSON so Decimal and Binary values survive the round trip
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+class Checkpoint:
+    """
+    Progress of one migration: the LastEvaluatedKey of every scan segment and
+    the number of items written so far, saved to a local JSON file so a
+    restarted migration resumes where it stopped.
+    """
+    def __init__(self, source_table_name, target_table_name, total_segments, directory=CHECKPOINT_DIR, mode=None):
+        # Each run mode (e.g. "incremental") keeps its own file so modes never resume each other
+        name = f"{source_table_name}__{target_table_name}" + (f".{mode}" if mode else "")
+        self.path = os.path.join(directory, f"{name}.json")
+        self.total_segments = total_segments
+        self.items_written = 0
+        self.segments = {segment: {"key": None, "done": False} for segment in range(total_segments)}
+        self.resumed = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            saved = json.load(f)
+        if saved.get("total_segments") != self.total_segments:
+            print(f"Ignoring checkpoint {self.path}: it was written with "
+                  f"{saved.get('total_segments')} segments, not {self.total_segments}.")
+            return
+        for segment, state in saved["segments"].items():
+            key = state.get("key")
+            self.segments[int(segment)] = {
+                "key": {k: deserializer.deserialize(v) for k, v in key.items()} if key else None,
+                "done": state.get("done", False)
+            }
+        self.items_written = saved.get("items_written", 0)
+        self.resumed = True
+        print(f"Resuming from checkpoint {self.path} ({self.items_written} items already written).")
+
+    def is_done(self, segment):
+        return self.segments[segment]["done"]
+
+    def start_key(self, segment):
+        """Return the key the segment should resume after, or None to start from the beginning."""
+        return self.segments[segment]["key"]
+
+    def record(self, segment, next_key, items):
+        """Mark a page of the segment as written; next_key is None when the segment is finished."""
+        self.segments[segment] = {"key": next_key, "done": next_key is None}
+        self.items_written += items
+
+    def save(self):
+        """Write the checkpoint atomically so a crash mid-save never corrupts it."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        state = {
+            "total_segments": self.total_segments,
+            "items_written": self.items_written,
+            "updated_at": time.time(),
+            "segments": {
+                str(segment): {
+                    "key": {k: serializer.serialize(v) for k, v in seg["key"].items()} if seg["key"] else None,
+                    "done": seg["done"]
+                }
+                for segment, seg in self.segments.items()
+            }
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def complete(self):
+        """Remove the checkpoint once the migration has finished."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,148 @@
+import atexit
+import hashlib
+import json
+import sqlite3
+import threading
+
+from boto3.dynamodb.types import Binary
+
+# Content index configuration – adjust as needed
+INDEX_PATH = 'content_index.sqlite3'  # Shared by every migration that skips unchanged items
+LOOKUP_BATCH = 500                    # Source keys looked up per query
+
+def _default(value):
+    # Sets have no stable order and Binary/bytes are not JSON
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, Binary):
+        value = value.value
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+def content_hash(item):
+    """Stable hash of a source item's content, whichever order its attributes come in."""
+    encoded = json.dumps(item, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_default)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+def _key_value(value):
+    # The same key scanned as DynamoDB JSON ({"S": "abc"}) or as a plain value
+    if isinstance(value, dict) and len(value) == 1:
+        (kind, data), = value.items()
+        if kind in ("S", "N", "B"):
+            return str(data)
+    return str(value)
+
+class ContentIndex:
+    """
+    Local index of what a migration last wrote: for each source key, the hash
+    of the source item and the TRANSFORM_VERSION it was transformed with.
+    changed() drops items whose hash and version are unchanged, so a re-run
+    only deserializes, transforms, translates and writes the delta; commit()
+    records the items passed through once their writes have been flushed.
+    Hashes are of the raw items as read, so switching between a table scan
+    and an export (or wire format on or off) rewrites everything once.
+    failures, if given, returns a running count of degraded transforms (such
+    as translations that fell back to the source text, or items too large to
+    write); items committed while it grew are not recorded, so the next run
+    transforms them again.
+    """
+    def __init__(self, table_name, key_fields, version, path=INDEX_PATH, failures=None):
+        self.table_name = table_name
+        self.key_fields = key_fields
+        self.version = str(version)
+        self.failures = failures
+        self.skipped = 0
+        self.recorded = 0
+        self.unrecorded = 0
+        self._pending = []
+        self._failures_seen = failures() if failures else 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS content_hashes ("
+            " table_name TEXT NOT NULL,"
+            " item_key TEXT NOT NULL,"
+            " source_hash TEXT NOT NULL,"
+            " transform_version TEXT NOT NULL,"
+            " PRIMARY KEY (table_name, item_key))"
+        )
+        self._conn.commit()
+        atexit.register(self.close)
+
+    def item_key(self, item):
+        return "\x1f".join(_key_value(item.get(field)) for field in self.key_fields)
+
+    def _lookup(self, keys):
+        placeholders = ", ".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_key, source_hash FROM content_hashes"
+                f" WHERE table_name = ? AND transform_version = ? AND item_key IN ({placeholders})",
+                [self.table_name, self.version] + keys
+            ).fetchall()
+        return dict(rows)
+
+    def changed(self, items):
+        """
+        Yield the items that are new or changed since they were last
+        recorded, remembering their hashes until commit().
+        """
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= LOOKUP_BATCH:
+                yield from self._changed(batch)
+                batch = []
+        yield from self._changed(batch)
+
+    def _changed(self, batch):
+        if not batch:
+            return
+        entries = [(self.item_key(item), content_hash(item), item) for item in batch]
+        recorded = self._lookup([key for key, _, _ in entries])
+        for key, digest, item in entries:
+            if recorded.get(key) == digest:
+                self.skipped += 1
+                continue
+            self._pending.append((key, digest))
+            yield item
+
+    def commit(self):
+        """Record every item changed() passed through; call once they have been written."""
+        pending, self._pending = self._pending, []
+        if self.failures:
+            failures = self.failures()
+            if failures != self._failures_seen:
+                self._failures_seen = failures
+                self.unrecorded += len(pending)
+                return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO content_hashes (table_name, item_key, source_hash, transform_version)"
+                " VALUES (?, ?, ?, ?)",
+                [(self.table_name, key, digest, self.version) for key, digest in pending]
+            )
+            self._conn.commit()
+        self.recorded += len(pending)
+
+    def clear(self):
+        """Forget everything recorded for this table, so the next run writes every item."""
+        with self._lock:
+            self._conn.execute("DELETE FROM content_hashes WHERE table_name = ?", (self.table_name,))
+            self._conn.commit()
+
+    def summary(self):
+        text = f"{self.skipped} unchanged items skipped, {self.recorded} recorded"
+        if self.unrecorded:
+            text += f", {self.unrecorded} left for the next run after failed transforms"
+        return text
+
+    def close(self):
+        """Close the index file; safe to call more than once."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.close()
+            self._conn = None
@@ -1,18 +1,30 @@
-import boto3
 import json
 from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
+from AwsClients import lazy_client, lazy_table
+from MigrationPipeline import run_migration
+from SchemaMapping import compile_mapping, computed, constant, field, source_fields, translated
+from TranslationBatcher import TranslationBatcher
+from TranslationCache import translation_cache
+from TranslationExecutor import TranslationExecutor
+from TranslationLimiter import translation_limiter
+
 # AWS Configuration
 REGION = 'us-east-1'
 SOURCE_TABLE_NAME = 'dev-languageApp-spanishCourse'           # Adjust the source table name
 TARGET_TABLE_NAME = 'juno-middleware-languageApp-ChatterBoxCourses'  # The target table
+TOTAL_SEGMENTS = 2  # Number of parallel scan workers for the source table
+WRITE_WORKERS = 2  # BatchWriteItem requests kept in flight against the target table
+CAPACITY_SHARE = 0.5  # Share of each table's read/write capacity the migration may consume
+TRANSFORM_WORKERS = 8  # Items transformed (and translated) concurrently
+SOURCE_EXPORT = None  # Local DynamoDB export (directory, glob or .json.gz file) to read instead of scanning
+IMPORT_OUTPUT_DIR = None  # Write ImportTable files here instead of writing to the target table (initial load)
 
-# Initialize AWS services
-dynamodb = boto3.resource('dynamodb', region_name=REGION)
-translate = boto3.client('translate', region_name=REGION)
-source_table = dynamodb.Table(SOURCE_TABLE_NAME)
-target_table = dynamodb.Table(TARGET_TABLE_NAME)
+# AWS clients and tables are created on first use, from one shared session and connection pool
+translate = lazy_client('translate', REGION)
+source_table = lazy_table(SOURCE_TABLE_NAME, REGION)
+target_table = lazy_table(TARGET_TABLE_NAME, REGION)
 
 # Deserializer for DynamoDB JSON format
 deserializer = TypeDeserializer()
@@ -21,78 +33,76 @@ def deserialize_item(item):
     """Convert a DynamoDB item with type wrappers into a plain Python dict."""
     return {k: deserializer.deserialize(v) for k, v in item.items()}
 
+def send_translation(text, source_lang, target_lang):
+    """Send one TranslateText request, paced to the Translate quota and retried when throttled."""
+    return translation_limiter.send(translate, text, source_lang, target_lang)
+
+# Packs short descriptions translated at the same time into one request
+translation_batcher = TranslationBatcher(send_translation)
+
 def translate_text(text, source_lang="en", target_lang="es"):
     """Translate text using AWS Translate."""
     if not text.strip():
         return ""
     
+    cached = translation_cache.get(text, source_lang, target_lang)
+    if cached is not None:
+        return cached
+    
     try:
-        response = translate.translate_text(
-            Text=text,
-            SourceLanguageCode=source_lang,
-            TargetLanguageCode=target_lang
-        )
-        return response["TranslatedText"]
+        translated = translation_batcher.translate(text, source_lang, target_lang)
+        translation_cache.put(text, source_lang, target_lang, translated)
+        return translated
     except ClientError as e:
         print(f"Translation error: {e.response['Error']['Message']}")
+        translation_limiter.fallback()
         return text  # Fallback to original text if translation fails
 
-def transform_item(item):
-    """Transform a deserialized source item into the target schema."""
-    
-    # Extract and format the Images field (store as a JSON string)
-    images = []
-    if isinstance(item.get("Images"), list):
-        images = [{"URL": img.get("URL", "")} for img in item["Images"]]
-    
-    images_json = json.dumps(images)  # Convert list to JSON string for DynamoDB storage
+# Shared pool so an item's translations (and several items' translations) run concurrently
+translation_executor = TranslationExecutor(translate_text)
+
+def images_json(images):
+    """Keep only each image's URL and store the list as a JSON string for DynamoDB."""
+    if not isinstance(images, list):
+        images = []
+    return json.dumps([{"URL": img.get("URL", "")} for img in images])
 
-    # Extract and translate the description
-    english_description = item.get("Description", "")
-    translated_description = translate_text(english_description, source_lang="en", target_lang="es")
+# The target schema; the English description is translated to Spanish
+MAPPING = {
+    "Identifier": field("Identifier"),
+    "Targ_Lang_Code": constant("ES"),  # Target Language is always Spanish
+    "Base_Lang_Code": constant("EN"),  # Base Language is always English
+    "City": field("City"),
+    "Country": field("Country"),
+    "Base_Lang_Description": translated("Description", "en", "es"),  # Spanish translation
+    "Target_Lang_Description": field("Description"),  # Original English description
+    "Images": computed(images_json, "Images", default=None),  # Now storing as a JSON string
+    "Vocabulary_List": field("Vocabulary_List")
+}
 
-    new_item = {
-        "Identifier": item.get("Identifier", ""),
-        "Targ_Lang_Code": "ES",  # Target Language is always Spanish
-        "Base_Lang_Code": "EN",  # Base Language is always English
-        "City": item.get("City", ""),
-        "Country": item.get("Country", ""),
-        "Base_Lang_Description": translated_description,  # Spanish translation
-        "Target_Lang_Description": english_description,  # Original English description
-        "Images": images_json,  # Now storing as a JSON string
-        "Vocabulary_List": item.get("Vocabulary_List", "")
-    }
-    return new_item
+# Every attribute transform_item reads; scans fetch only these
+SOURCE_FIELDS = source_fields(MAPPING)
+
+transform_item = compile_mapping(MAPPING, translate_many=translation_executor.translate_many)
 
 def migrate_items():
     try:
         print("Starting migration for Courses...")
-        response = source_table.scan()
-        items = response.get('Items', [])
-        
-        # If items are in raw DynamoDB format (with "S", etc.), deserialize them
-        if items and isinstance(next(iter(items[0].values())), dict) and 'S' in next(iter(items[0].values())):
-            print("Deserializing items from raw DynamoDB format...")
-            items = [deserialize_item(item) for item in items]
-        
-        # Handle pagination
-        while 'LastEvaluatedKey' in response:
-            response = source_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-            new_items = response.get('Items', [])
-            if new_items and isinstance(next(iter(new_items[0].values())), dict) and 'S' in next(iter(new_items[0].values())):
-                new_items = [deserialize_item(item) for item in new_items]
-            items.extend(new_items)
-        
-        print(f"Found {len(items)} items in the source table.")
-        
-        # Write to target table using batch_writer for efficiency
-        with target_table.batch_writer() as batch:
-            for item in items:
-                new_item = transform_item(item)
-                batch.put_item(Item=new_item)
-                print(f"Migrated item Identifier: {new_item.get('Identifier')}, City: {new_item.get('City')}")
-                
-        print("Migration completed successfully.")
+        return run_migration(
+            source_table, target_table, transform_item, SOURCE_FIELDS, TOTAL_SEGMENTS,
+            write_workers=WRITE_WORKERS,
+            capacity_share=CAPACITY_SHARE,
+            source_export=SOURCE_EXPORT,
+            # Export items are always DynamoDB JSON
+            wire_deserialize=deserialize_item,
+            transform_workers=TRANSFORM_WORKERS,
+            import_output_dir=IMPORT_OUTPUT_DIR,
+            reports={
+                "Translation cache": translation_cache,
+                "Translate requests": translation_batcher,
+                "Translate quota": translation_limiter
+            }
+        )
     
     except ClientError as e:
         print(f"An error occurred: {e.response['Error']['Message']}")
@@ -0,0 +1,223 @@
+import argparse
+import importlib
+import math
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from AwsClients import lazy_table
+from ItemEncoding import ItemEncoder, item_size
+from MigrationPipeline import transform_concurrently
+from Orchestrator import discover_migrations
+from ParallelScan import projection, scan_segment
+from RateController import ON_DEMAND_WRITE_UNITS, CapacityController
+from TranslationCache import TranslationCache
+from TranslationLimiter import TranslationLimiter
+from Verify import source_functions, table_names
+from WireFormat import WireTable, item_from_wire
+
+# Dry run configuration – adjust as needed
+DEFAULT_SAMPLE_SEGMENTS = 10   # Scan segments read in full
+DEFAULT_FRACTION = 0.01        # Share of the table those segments cover
+TRANSLATE_LATENCY = 0.2        # Assumed seconds per TranslateText request
+TRANSLATE_PRICE = 15.0         # USD per million characters (standard real-time translation)
+
+class CountingTranslate:
+    """Stand-in for the AWS Translate client: counts every request and returns the text unchanged."""
+    def __init__(self):
+        self.requests = 0
+        self.characters = 0
+        self._lock = threading.Lock()
+
+    def translate_text(self, Text, SourceLanguageCode, TargetLanguageCode, **kwargs):
+        with self._lock:
+            self.requests += 1
+            self.characters += len(Text)
+        return {"TranslatedText": Text}
+
+def _write_rate(target, share):
+    try:
+        return CapacityController.for_writes(target, share).target
+    except ClientError:
+        # The target table may not exist before the cutover
+        return ON_DEMAND_WRITE_UNITS * share
+
+def _stub_translation(module, translate):
+    """Point a translating migration at translate and return a function that undoes it."""
+    names = ("translate", "translation_limiter", "translation_cache")
+    saved = {name: getattr(module, name) for name in names if hasattr(module, name)}
+    if "translate" in saved:
+        module.translate = translate
+        # No pacing, and the cache is read but stub translations never reach the file
+        module.translation_limiter = TranslationLimiter(10 ** 6, 10 ** 9)
+        module.translation_cache = TranslationCache(read_only=True)
+
+    def restore():
+        for name, value in saved.items():
+            setattr(module, name, value)
+    return restore
+
+def dry_run(module, sample_segments=DEFAULT_SAMPLE_SEGMENTS, fraction=DEFAULT_FRACTION, concurrency=None, seed=None):
+    """
+    Estimate a migration without writing anything: a random sample of scan
+    segments is read in full and run through the migration's own transform,
+    with AWS Translate replaced by a stub that only counts what would be sent
+    (after the translation cache and request batching). Totals are the
+    sample scaled up by the number of segments per sampled segment.
+    concurrency is the number of items transformed at once (default: the
+    migration's TRANSFORM_PROCESSES or TRANSFORM_WORKERS).
+    """
+    source_name, target_name = table_names(module)
+    source = WireTable(lazy_table(source_name, module.REGION))
+    target = lazy_table(target_name, module.REGION)
+    share = getattr(module, "CAPACITY_SHARE", 0.5)
+    concurrency = (concurrency or getattr(module, "TRANSFORM_PROCESSES", 0)
+                   or getattr(module, "TRANSFORM_WORKERS", 1))
+    total_segments = max(sample_segments, round(sample_segments / fraction))
+    segments = random.Random(seed).sample(range(total_segments), sample_segments)
+
+    deserialize, transform, wire = source_functions(module)
+    fields = getattr(module, "SOURCE_FIELDS", None) or getattr(module, "FIELDS_TO_COPY", None)
+    scan_kwargs = dict(projection(fields) if fields else {}, ReturnConsumedCapacity="TOTAL")
+    large_fields = getattr(module, "LARGE_JSON_FIELDS", []) if getattr(module, "COMPRESS_LARGE_FIELDS", False) else []
+    encoder = ItemEncoder(target_name, [key["AttributeName"] for key in source.key_schema], large_fields,
+                          report_path=None)
+    translating = hasattr(module, "translate")
+    # Translating transforms wait on Translate, so they are sampled concurrently (which also
+    # batches requests as a real run would); the others are timed one at a time
+    workers = concurrency if translating else 1
+
+    sample = {"items": 0, "source_bytes": 0, "read_units": 0.0, "write_units": 0, "transform_seconds": 0.0}
+    lock = threading.Lock()
+
+    def timed_transform(item):
+        start = time.perf_counter()
+        if deserialize:
+            item = deserialize(item)
+        new_item = transform(item)
+        with lock:
+            sample["transform_seconds"] += time.perf_counter() - start
+        return new_item
+
+    def source_items():
+        for segment in segments:
+            for page in scan_segment(source, segment, total_segments, **scan_kwargs):
+                sample["read_units"] += page.consumed
+                for raw_item in page:
+                    sample["items"] += 1
+                    sample["source_bytes"] += item_size(item_from_wire(raw_item))
+                    yield raw_item
+
+    translate = CountingTranslate()
+    restore = _stub_translation(module, translate)
+    start = time.monotonic()
+    try:
+        for _, new_item in transform_concurrently(source_items(), timed_transform, workers):
+            new_item = encoder.encode(item_from_wire(new_item) if wire else new_item)
+            if new_item is not None:
+                # A put costs one write unit per started KB
+                sample["write_units"] += max(1, math.ceil(item_size(new_item) / 1024))
+        cache_hits = module.translation_cache.hits if translating else 0
+    finally:
+        restore()
+    sample_seconds = time.monotonic() - start
+
+    scale = total_segments / sample_segments
+    if not sample["read_units"]:
+        # No ConsumedCapacity in the responses: eventually consistent scans cost half a unit per 4 KB
+        sample["read_units"] = sample["source_bytes"] / 4096 / 2
+    estimate = {
+        "items": sample["items"] * scale,
+        "source_bytes": sample["source_bytes"] * scale,
+        "target_bytes": encoder.bytes_out * scale,
+        "read_units": sample["read_units"] * scale,
+        "write_units": sample["write_units"] * scale,
+        "oversized_items": encoder.oversized * scale,
+        "translate_requests": translate.requests * scale,
+        "translate_characters": translate.characters * scale,
+        "translate_cache_hits": cache_hits * scale
+    }
+    estimate["translate_cost"] = estimate["translate_characters"] / 10 ** 6 * TRANSLATE_PRICE
+
+    # The pipeline overlaps its stages, so the slowest one sets the pace
+    seconds = {
+        "reads": estimate["read_units"] / CapacityController.for_reads(source.table, share).target,
+        "transform": sample["transform_seconds"] * scale / concurrency
+    }
+    if not getattr(module, "IMPORT_OUTPUT_DIR", None):
+        seconds["writes"] = estimate["write_units"] / _write_rate(target, share)
+    if translating and translate.requests:
+        limiter = module.translation_limiter
+        seconds["translate"] = max(
+            estimate["translate_requests"] / limiter.request_bucket.max_rate,
+            estimate["translate_characters"] / limiter.character_bucket.max_rate,
+            estimate["translate_requests"] * TRANSLATE_LATENCY / concurrency
+        )
+    return {
+        "source_table": source_name, "target_table": target_name,
+        "sampled_segments": sample_segments, "total_segments": total_segments,
+        "sampled_items": sample["items"], "sample_seconds": sample_seconds,
+        "table_item_count": source.table.item_count,
+        "concurrency": concurrency, "estimate": estimate, "seconds": seconds,
+        "bottleneck": max(seconds, key=seconds.get), "wall_clock_seconds": max(seconds.values())
+    }
+
+def _duration(seconds):
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+def print_result(name, result):
+    estimate = result["estimate"]
+    print(f"{name}: sampled {result['sampled_segments']} of {result['total_segments']} segments of "
+          f"{result['source_table']}: {result['sampled_items']} items in {result['sample_seconds']:.1f}s")
+    print(f"  Items:     ~{estimate['items']:,.0f} (DescribeTable ItemCount {result['table_item_count']:,}, "
+          f"updated about every six hours)")
+    print(f"  Reads:     {estimate['source_bytes'] / 2 ** 20:,.1f} MB, {estimate['read_units']:,.0f} RCU")
+    print(f"  Writes:    {estimate['target_bytes'] / 2 ** 20:,.1f} MB, {estimate['write_units']:,.0f} WCU"
+          + (f", ~{estimate['oversized_items']:,.0f} items over the size limit" if estimate["oversized_items"] else ""))
+    if estimate["translate_requests"] or estimate["translate_cache_hits"]:
+        print(f"  Translate: {estimate['translate_requests']:,.0f} requests, "
+              f"{estimate['translate_characters']:,.0f} characters (~${estimate['translate_cost']:,.2f}); "
+              f"{estimate['translate_cache_hits']:,.0f} strings answered by the translation cache")
+    stages = ", ".join(f"{stage} {_duration(seconds)}" for stage, seconds in result["seconds"].items())
+    print(f"  Time:      about {_duration(result['wall_clock_seconds'])} at concurrency {result['concurrency']}, "
+          f"bound by {result['bottleneck']} ({stages})")
+
+def main():
+    available = discover_migrations()
+    parser = argparse.ArgumentParser(
+        description="Estimate migrations from a random sample of their source tables, writing nothing.")
+    parser.add_argument("migrations", nargs="*", metavar="MIGRATION",
+                        help=f"Migrations to estimate (default: all of {', '.join(available)})")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SAMPLE_SEGMENTS,
+                        help="Scan segments to read in full")
+    parser.add_argument("--fraction", type=float, default=DEFAULT_FRACTION,
+                        help="Share of each table the sampled segments cover")
+    parser.add_argument("--concurrency", type=int,
+                        help="Items transformed at once (default: the migration's)")
+    parser.add_argument("--seed", type=int, help="Seed for choosing the sampled segments")
+    args = parser.parse_args()
+    if not 0 < args.fraction <= 1:
+        parser.error("--fraction must be in (0, 1]")
+
+    names = args.migrations or list(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown migration(s): {', '.join(unknown)}")
+
+    for name in names:
+        module = importlib.import_module(available[name])
+        try:
+            result = dry_run(module, args.segments, args.fraction, args.concurrency, args.seed)
+        except ClientError as e:
+            print(f"{name}: an error occurred: {e.response['Error']['Message']}")
+            continue
+        print_result(name, result)
+
+if __name__ == "__main__":
+    main()
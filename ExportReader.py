@@ -0,0 +1,131 @@
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+
+from Instrumentation import carry_metrics, metrics
+from ParallelScan import MAX_BUFFERED_PAGES, ScanPage
+
+# Export reader configuration – adjust as needed
+DEFAULT_READERS = 4       # Export data files read at once
+ITEMS_PER_PAGE = 1000     # Items handed to the pipeline per page
+
+# Marker a reader puts on the queue when it has no files left
+_READER_DONE = object()
+
+def export_files(path):
+    """
+    Return the data files of a DynamoDB export in a stable order. path may be
+    a single file, a glob, or a directory searched recursively for
+    *.json.gz / *.json data files (an S3 export downloaded as-is, with its
+    AWSDynamoDB/<export id>/data/ layout). Manifest files are skipped.
+    """
+    if os.path.isdir(path):
+        files = (glob.glob(os.path.join(path, "**", "*.json.gz"), recursive=True)
+                 + glob.glob(os.path.join(path, "**", "*.json"), recursive=True))
+    elif os.path.isfile(path):
+        files = [path]
+    else:
+        files = glob.glob(path)
+    files = sorted(f for f in files if not os.path.basename(f).startswith("manifest-"))
+    if not files:
+        raise FileNotFoundError(f"No DynamoDB export data files found at {path}")
+    return files
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+def read_export_file(path, segment=0, start_line=0, fields=None, items_per_page=ITEMS_PER_PAGE):
+    """
+    Yield the items of one export data file ({"Item": {...}} per line) as
+    ScanPages of raw DynamoDB JSON items, skipping the first start_line lines.
+    Each page's next_key is the line to resume after; the last page's is None.
+    With fields, every other attribute is dropped as the item is read.
+    """
+    items = []
+    line_number = 0
+    with _open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if line_number <= start_line or not line.strip():
+                continue
+            item = json.loads(line)["Item"]
+            if fields:
+                item = {field: item[field] for field in fields if field in item}
+            items.append(item)
+            if len(items) >= items_per_page:
+                metrics.count("scan", len(items))
+                yield ScanPage(items, segment, {"line": line_number})
+                items = []
+    metrics.count("scan", len(items))
+    yield ScanPage(items, segment, None)
+
+def read_export(files, checkpoint=None, readers=DEFAULT_READERS, fields=None):
+    """
+    Read DynamoDB export data files with up to readers threads and yield
+    pages as they arrive, like parallel_scan: each file is a segment, so a
+    Checkpoint built with len(files) segments skips finished files and
+    resumes the others from their saved line. Reading uses no read capacity
+    on the source table. Items are raw DynamoDB JSON, so pair this with a
+    deserialize function that accepts {"S": ...} values.
+    Any error raised by a reader is re-raised to the caller.
+    """
+    work = queue.Queue()
+    for segment, path in enumerate(files):
+        if not (checkpoint and checkpoint.is_done(segment)):
+            work.put((segment, path))
+
+    pages = queue.Queue(maxsize=MAX_BUFFERED_PAGES)
+    stop = threading.Event()
+
+    def put(entry):
+        # Block while the queue is full, but give up once the consumer has stopped
+        while not stop.is_set():
+            try:
+                pages.put(entry, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def reader():
+        try:
+            while not stop.is_set():
+                try:
+                    segment, path = work.get_nowait()
+                except queue.Empty:
+                    return
+                resume = checkpoint.start_key(segment) if checkpoint else None
+                start_line = int(resume["line"]) if resume else 0
+                for page in read_export_file(path, segment, start_line, fields):
+                    if stop.is_set():
+                        return
+                    put(page)
+        except Exception as e:
+            put(e)
+        finally:
+            put(_READER_DONE)
+
+    threads = [
+        threading.Thread(target=carry_metrics(reader), daemon=True)
+        for _ in range(max(1, min(readers, work.qsize())))
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        remaining = len(threads)
+        while remaining:
+            entry = pages.get()
+            if entry is _READER_DONE:
+                remaining -= 1
+            elif isinstance(entry, Exception):
+                raise entry
+            else:
+                yield entry
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,224 @@
+import itertools
+import json
+import os
+import threading
+import time
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from AwsClients import get_client
+from BatchWriter import ConcurrentBatchWriter
+from Checkpoint import CHECKPOINT_DIR
+from MigrationPipeline import timed
+
+# Incremental configuration – adjust as needed
+RECORDS_PER_SAVE = 1000   # Change records written between saves of the feed position
+EMPTY_POLLS_BEFORE_STOP = 3  # Empty GetRecords responses before an open shard counts as caught up
+CLOCK_SKEW_MARGIN = 300   # Seconds a live scan's mark is set back from the run's start, for clock skew
+
+# Stream images and saved marks use DynamoDB JSON
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+def deserialize_image(image):
+    """Convert a stream record image (DynamoDB JSON) into a plain Python dict."""
+    return {k: deserializer.deserialize(v) for k, v in image.items()}
+
+class Watermark:
+    """
+    Local record of how far a migration has got: the timestamp from which
+    the next incremental run must migrate, and the positions a change feed
+    has been replayed to. Saved next to the checkpoints.
+    """
+    def __init__(self, source_table_name, target_table_name, directory=CHECKPOINT_DIR):
+        self.path = os.path.join(directory, f"{source_table_name}__{target_table_name}.watermark.json")
+        self.mark = None
+        self.pending_mark = None
+        self.positions = {}
+        self._seen = None
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved.get("mark"):
+                self.mark = deserializer.deserialize(saved["mark"])
+            if saved.get("pending_mark"):
+                self.pending_mark = deserializer.deserialize(saved["pending_mark"])
+            self.positions = saved.get("positions", {})
+
+    def begin(self, units_per_second=1):
+        """
+        Start a run over the live table. A parallel scan is not a snapshot:
+        an item written during the run can land in a segment already read,
+        so the next mark is this run's start less CLOCK_SKEW_MARGIN (in
+        timestamp units), not the highest timestamp seen. A failed run keeps
+        its start, so resuming it does not move the mark past its reads.
+        """
+        if self.pending_mark is None:
+            self.pending_mark = int((time.time() - CLOCK_SKEW_MARGIN) * units_per_second)
+            self.save()
+
+    def observe(self, value):
+        """
+        Track the highest timestamp migrated by a run over a snapshot (an
+        export), where no item can appear behind it; empty or mismatched
+        values are ignored.
+        """
+        if value in (None, ""):
+            return
+        with self._lock:
+            if self._seen is None or (type(value) is type(self._seen) and value > self._seen):
+                self._seen = value
+
+    def advance(self):
+        """Move the mark up to the run's start (or the highest snapshot timestamp); call once a run has completed."""
+        with self._lock:
+            next_mark = self.pending_mark if self.pending_mark is not None else self._seen
+            if next_mark is not None and (self.mark is None or next_mark > self.mark):
+                self.mark = next_mark
+            self.pending_mark = None
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        state = {
+            "mark": serializer.serialize(self.mark) if self.mark is not None else None,
+            "pending_mark": serializer.serialize(self.pending_mark) if self.pending_mark is not None else None,
+            "positions": self.positions
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+class StreamChangeFeed:
+    """
+    Change feed backed by the source table's DynamoDB Stream (NEW_IMAGE or
+    NEW_AND_OLD_IMAGES). Each shard resumes after the last sequence number
+    saved in the watermark; parent shards are read before their children so
+    changes to one key are replayed in order.
+    """
+    def __init__(self, table, watermark):
+        self.watermark = watermark
+        self.stream_arn = table.latest_stream_arn
+        if not self.stream_arn:
+            raise ValueError(f"Table {table.name} has no DynamoDB Stream enabled")
+        self.streams = get_client("dynamodbstreams", table.meta.client.meta.region_name)
+
+    def _shards(self):
+        shards = []
+        kwargs = {"StreamArn": self.stream_arn}
+        while True:
+            description = self.streams.describe_stream(**kwargs)["StreamDescription"]
+            shards.extend(description["Shards"])
+            if "LastEvaluatedShardId" not in description:
+                break
+            kwargs["ExclusiveStartShardId"] = description["LastEvaluatedShardId"]
+
+        # Order parents before children
+        by_id = {shard["ShardId"]: shard for shard in shards}
+        ordered, visited = [], set()
+        def visit(shard):
+            if shard["ShardId"] in visited:
+                return
+            visited.add(shard["ShardId"])
+            parent = by_id.get(shard.get("ParentShardId"))
+            if parent:
+                visit(parent)
+            ordered.append(shard)
+        for shard in shards:
+            visit(shard)
+        return ordered
+
+    def records(self):
+        """Yield stream records not yet replayed, each tagged with its shard as "_position"."""
+        for shard in self._shards():
+            shard_id = shard["ShardId"]
+            last_sequence = self.watermark.positions.get(shard_id)
+            if last_sequence:
+                iterator = self.streams.get_shard_iterator(
+                    StreamArn=self.stream_arn, ShardId=shard_id,
+                    ShardIteratorType="AFTER_SEQUENCE_NUMBER", SequenceNumber=last_sequence
+                )["ShardIterator"]
+            else:
+                iterator = self.streams.get_shard_iterator(
+                    StreamArn=self.stream_arn, ShardId=shard_id, ShardIteratorType="TRIM_HORIZON"
+                )["ShardIterator"]
+
+            closed = "EndingSequenceNumber" in shard.get("SequenceNumberRange", {})
+            empty_polls = 0
+            while iterator:
+                response = self.streams.get_records(ShardIterator=iterator, Limit=1000)
+                for record in response["Records"]:
+                    record["_position"] = (shard_id, record["dynamodb"]["SequenceNumber"])
+                    yield record
+                iterator = response.get("NextShardIterator")
+                if response["Records"]:
+                    empty_polls = 0
+                elif not closed:
+                    empty_polls += 1
+                    if empty_polls >= EMPTY_POLLS_BEFORE_STOP:
+                        break
+
+    def commit(self, record):
+        shard_id, sequence = record["_position"]
+        self.watermark.positions[shard_id] = sequence
+
+class FileChangeFeed:
+    """
+    Local stand-in for a DynamoDB Stream: a JSON lines file of stream-shaped
+    records ({"eventName": ..., "dynamodb": {"Keys": ..., "NewImage": ...}}).
+    Replay resumes after the last line saved in the watermark, so appending
+    lines and re-running behaves like a live feed.
+    """
+    def __init__(self, path, watermark):
+        self.path = path
+        self.watermark = watermark
+
+    def records(self):
+        start = self.watermark.positions.get(self.path, 0)
+        with open(self.path) as f:
+            for line_number, line in enumerate(f, 1):
+                if line_number <= start or not line.strip():
+                    continue
+                record = json.loads(line)
+                record["_position"] = line_number
+                yield record
+
+    def commit(self, record):
+        self.watermark.positions[self.path] = record["_position"]
+
+def migrate_changes(feed, transform, target_table, watermark, on_migrated=None, write_controller=None):
+    """
+    Replay a change feed into the target table: INSERT and MODIFY records put
+    the transformed NewImage, REMOVE records delete the transformed key
+    (built from OldImage when the stream carries it). Batches are written one
+    at a time so successive changes to one key are applied in feed order.
+    The feed position is saved after every RECORDS_PER_SAVE records have been
+    written, so an interrupted catch-up resumes where it stopped.
+    Returns the number of records applied.
+    """
+    records = feed.records()
+    transform, deserialize = timed("transform", transform), timed("deserialize", deserialize_image)
+    total = 0
+    while True:
+        window = list(itertools.islice(records, RECORDS_PER_SAVE))
+        if not window:
+            return total
+        with ConcurrentBatchWriter(target_table, 1, controller=write_controller) as batch:
+            for record in window:
+                data = record["dynamodb"]
+                if record["eventName"] == "REMOVE":
+                    # OldImage (NEW_AND_OLD_IMAGES streams) carries target key attributes
+                    # that the source key alone may not
+                    key_item = transform(deserialize(data.get("OldImage") or data["Keys"]))
+                    batch.delete_item(Key={name: key_item[name] for name in batch.overwrite_by_pkeys})
+                    new_item = None
+                else:
+                    new_item = transform(deserialize(data["NewImage"]))
+                    batch.put_item(Item=new_item)
+                total += 1
+                if on_migrated:
+                    on_migrated(total, record, new_item)
+        for record in window:
+            feed.commit(record)
+        watermark.save()
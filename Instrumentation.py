@@ -0,0 +1,213 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Instrumentation configuration – adjust as needed
+PROGRESS_INTERVAL = 5.0      # Seconds between progress lines (and metrics file exports)
+METRICS_DIR = 'metrics'      # Local directory the metrics file is written to
+METRICS_FORMAT = 'prometheus'  # 'prometheus' (text exposition format) or 'json'
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as Prometheus exposes them."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket, like histogram_quantile()."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKETS[-1]
+
+class Metrics:
+    """
+    Thread-safe registry of per-stage item counters and latency histograms
+    (scan, deserialize, transform, translate, write).
+    """
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def counter(self, stage):
+        with self._lock:
+            return self.counters.get(stage, 0)
+
+    def count(self, stage, items=1):
+        with self._lock:
+            self.counters[stage] = self.counters.get(stage, 0) + items
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self):
+        """One-line p50/p99 per stage, e.g. "scan p50 12.0ms p99 80.1ms | write ..."."""
+        with self._lock:
+            return " | ".join(
+                f"{stage} p50 {h.quantile(0.5) * 1000:.1f}ms p99 {h.quantile(0.99) * 1000:.1f}ms"
+                for stage, h in self.histograms.items()
+            )
+
+    def to_json(self):
+        with self._lock:
+            return {
+                "items": dict(self.counters),
+                "stages": {
+                    stage: {
+                        "count": h.count,
+                        "seconds": h.sum,
+                        "p50_ms": h.quantile(0.5) * 1000,
+                        "p99_ms": h.quantile(0.99) * 1000
+                    }
+                    for stage, h in self.histograms.items()
+                }
+            }
+
+    def to_prometheus(self, migration):
+        """Render the registry in the Prometheus text exposition format."""
+        lines = [
+            "# HELP migration_items_total Items processed by each migration stage.",
+            "# TYPE migration_items_total counter"
+        ]
+        with self._lock:
+            for stage, items in self.counters.items():
+                lines.append(f'migration_items_total{{migration="{migration}",stage="{stage}"}} {items}')
+            lines += [
+                "# HELP migration_stage_seconds Latency of one unit of work in each migration stage.",
+                "# TYPE migration_stage_seconds histogram"
+            ]
+            for stage, h in self.histograms.items():
+                labels = f'migration="{migration}",stage="{stage}"'
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, h.counts):
+                    cumulative += bucket_count
+                    lines.append(f'migration_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'migration_stage_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f"migration_stage_seconds_sum{{{labels}}} {h.sum}")
+                lines.append(f"migration_stage_seconds_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+# Registry of a migration run on its own; migrations run side by side in one
+# process (see Orchestrator) each record into their own with use_metrics
+process_metrics = Metrics()
+_local = threading.local()
+
+def current_metrics():
+    """The registry the calling thread records into."""
+    return getattr(_local, "registry", None) or process_metrics
+
+@contextmanager
+def use_metrics(registry):
+    """Record every stage run on this thread into registry."""
+    previous = getattr(_local, "registry", None)
+    _local.registry = registry
+    try:
+        yield registry
+    finally:
+        _local.registry = previous
+
+def carry_metrics(fn):
+    """
+    Wrap fn to record into the calling thread's registry when it runs on
+    another thread (scan workers, write and translation pools).
+    """
+    registry = current_metrics()
+    def run(*args, **kwargs):
+        with use_metrics(registry):
+            return fn(*args, **kwargs)
+    return run
+
+class _CurrentMetrics:
+    """Forwards to current_metrics(), so stages record into their own migration's registry."""
+    def __getattr__(self, name):
+        return getattr(current_metrics(), name)
+
+metrics = _CurrentMetrics()
+
+class ProgressReporter:
+    """
+    Replaces per-item prints: prints at most one progress line (items, rate
+    and per-stage latencies) every interval seconds, and rewrites the
+    metrics file at the same time so a live run can be watched or scraped
+    (e.g. by node_exporter's textfile collector).
+    """
+    def __init__(self, migration, interval=PROGRESS_INTERVAL, directory=METRICS_DIR, export_format=METRICS_FORMAT):
+        self.migration = migration
+        self.interval = interval
+        extension = "prom" if export_format == "prometheus" else "json"
+        self.path = os.path.join(directory, f"{migration}.{extension}") if directory else None
+        self.export_format = export_format
+        # The registry of the migration creating the reporter
+        self.metrics = current_metrics()
+        self.started = time.monotonic()
+        self.count = 0
+        self._last_report = self.started
+        self._lock = threading.Lock()
+
+    def update(self, count):
+        """Record that count items have been migrated; report if the interval has passed."""
+        with self._lock:
+            self.count = count
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self.report()
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        line = f"Migrated {self.count} items ({self.count / elapsed:.0f}/s)"
+        stages = self.metrics.summary()
+        print(f"{line} | {stages}" if stages else line, flush=True)
+        self.export()
+
+    def export(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self.export_format == "prometheus":
+            content = self.metrics.to_prometheus(self.migration)
+        else:
+            content = json.dumps({"migration": self.migration, "migrated": self.count, **self.metrics.to_json()}, indent=2)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        """Print the final progress line and write the final metrics file."""
+        self.report()
@@ -0,0 +1,152 @@
+import json
+import time
+import zlib
+from decimal import Decimal
+
+from boto3.dynamodb.types import Binary
+
+from Instrumentation import metrics
+
+# Item size configuration – adjust as needed
+MAX_ITEM_BYTES = 400 * 1024  # DynamoDB's item size limit, attribute names included
+COMPRESS_MIN_BYTES = 1024    # Encoded attributes at least this long are stored compressed
+COMPRESSION_LEVEL = 6        # zlib level for compressed attributes
+REPORT_PATH = 'oversized_items.jsonl'  # Items too large to write, one JSON line each
+REPORT_ATTRIBUTES = 5        # Largest attributes listed for each oversized item
+# Starts every compressed value: zlib-compressed UTF-8 text, format version 1.
+# Readers check for it and decompress (see decode_value).
+FORMAT_MARKER = b"ZLIB1\x00"
+
+def _text_size(text):
+    # str.isascii() is a flag check, so ASCII text is measured without encoding it
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+def _number_size(value):
+    # One byte per two significant digits, plus one
+    digits = str(value).lstrip("-").split("e")[0].split("E")[0].replace(".", "").strip("0")
+    return (len(digits) + 1) // 2 + 1
+
+def value_size(value):
+    """Bytes a Python attribute value counts for in DynamoDB's item size."""
+    if isinstance(value, str):
+        return _text_size(value)
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        return _number_size(value)
+    if isinstance(value, Binary):
+        return len(value.value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 3 + sum(_text_size(k) + value_size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 3 + sum(value_size(v) + 1 for v in value)
+    if isinstance(value, (set, frozenset)):
+        return sum(value_size(v) for v in value)
+    return _text_size(str(value))
+
+def item_size(item):
+    """Bytes an item counts for against MAX_ITEM_BYTES and in capacity units."""
+    return sum(_text_size(name) + value_size(value) for name, value in item.items())
+
+def is_encoded(value):
+    """Whether an attribute value was compressed by ItemEncoder."""
+    if isinstance(value, Binary):
+        value = value.value
+    return isinstance(value, (bytes, bytearray)) and value.startswith(FORMAT_MARKER)
+
+def decode_value(value):
+    """The original text of a value compressed by ItemEncoder; any other value is returned as it is."""
+    if not is_encoded(value):
+        return value
+    if isinstance(value, Binary):
+        value = value.value
+    return zlib.decompress(value[len(FORMAT_MARKER):]).decode("utf-8")
+
+def decode_item(item):
+    """An item read from the target table with every compressed attribute decoded."""
+    return {name: decode_value(value) for name, value in item.items()}
+
+class ItemEncoder:
+    """
+    Sizes each transformed item before it is written. String attributes
+    listed in fields (JSON documents such as Lessons) that are at least
+    min_bytes long are stored as Binary: FORMAT_MARKER followed by the
+    zlib-compressed UTF-8 text, kept only when it is smaller. Items still
+    larger than max_bytes are not written: each is printed and appended to
+    report_path (unless it is None) with its key and largest attributes,
+    instead of failing the whole batch inside BatchWriteItem.
+    """
+    def __init__(self, table_name, key_fields, fields=(), min_bytes=COMPRESS_MIN_BYTES,
+                 max_bytes=MAX_ITEM_BYTES, report_path=REPORT_PATH):
+        self.table_name = table_name
+        self.key_fields = key_fields
+        self.fields = list(fields)
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.report_path = report_path
+        self.items = 0
+        self.compressed = 0
+        self.oversized = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.largest = 0
+
+    def _compress(self, item):
+        for field in self.fields:
+            value = item.get(field)
+            if not isinstance(value, str) or _text_size(value) < self.min_bytes:
+                continue
+            encoded = FORMAT_MARKER + zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL)
+            if len(encoded) < _text_size(value):
+                item[field] = Binary(encoded)
+                self.compressed += 1
+
+    def encode(self, item):
+        """
+        Return the item to write, with large fields compressed, or None if it
+        is too large to write even so. The item is changed in place.
+        """
+        self.items += 1
+        self.bytes_in += item_size(item)
+        if self.fields:
+            self._compress(item)
+        size = item_size(item)
+        self.bytes_out += size
+        self.largest = max(self.largest, size)
+        if size > self.max_bytes:
+            self._report(item, size)
+            return None
+        return item
+
+    def _report(self, item, size):
+        self.oversized += 1
+        metrics.count("oversized_items")
+        key = {field: item.get(field) for field in self.key_fields}
+        attributes = sorted(((_text_size(name) + value_size(value), name) for name, value in item.items()),
+                            reverse=True)[:REPORT_ATTRIBUTES]
+        print(f"Item {json.dumps(key, default=str)} is {size} bytes, over the {self.max_bytes} byte "
+              f"item limit; not written to {self.table_name}"
+              + (f" (see {self.report_path})" if self.report_path else ""))
+        if not self.report_path:
+            return
+        with open(self.report_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "table": self.table_name,
+                "key": key,
+                "bytes": size,
+                "largest_attributes": {name: bytes_ for bytes_, name in attributes},
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }, default=str) + "\n")
+
+    def summary(self):
+        saved = self.bytes_in - self.bytes_out
+        text = (f"{self.items} items, {self.bytes_out / max(self.items, 1) / 1024:.1f} KB average, "
+                f"{self.largest / 1024:.1f} KB largest; {self.compressed} attributes compressed, "
+                f"{saved / 1024:.0f} KB saved")
+        if self.oversized:
+            text += f"; {self.oversized} items over {self.max_bytes} bytes not written"
+            if self.report_path:
+                text += f" (see {self.report_path})"
+        return text
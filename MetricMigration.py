@@ -1,17 +1,35 @@
-import boto3
+import argparse
 import json
+from boto3.dynamodb.conditions import Attr
 from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
+from AwsClients import lazy_table
+from BatchWriter import PartitionSpreader
+from IncrementalSync import FileChangeFeed, StreamChangeFeed, Watermark, migrate_changes
+from Instrumentation import ProgressReporter
+from MigrationPipeline import run_migration
+from RateController import CapacityController
+from SchemaMapping import compile_mapping, compile_wire_mapping, field
+from WireFormat import from_wire, to_wire
+
 # AWS Configuration – adjust as needed
 REGION = 'us-east-1'
 SOURCE_TABLE_NAME = 'dev-languageApp-userActions'  # Replace with the name of your old table
 TARGET_TABLE_NAME = 'userActions'       # New table name
+TOTAL_SEGMENTS = 8  # Number of parallel scan workers for the source table
+WRITE_WORKERS = 8  # BatchWriteItem requests kept in flight against the target table
+CAPACITY_SHARE = 0.5  # Share of each table's read/write capacity the migration may consume
+TIMESTAMP_ATTRIBUTE = 'timestamp'  # High-water mark attribute for incremental runs
+TIMESTAMP_UNITS_PER_SECOND = 1000  # The timestamp attribute holds epoch milliseconds
+WIRE_FORMAT = True  # Copy DynamoDB JSON attribute values directly, skipping deserialization
+SOURCE_EXPORT = None  # Local DynamoDB export (directory, glob or .json.gz file) to read instead of scanning
+IMPORT_OUTPUT_DIR = None  # Write ImportTable files here instead of writing to the target table (initial load)
+SPREAD_PARTITIONS = True  # Interleave writes across user_id partition keys instead of writing in scan order
 
-# Initialize DynamoDB resources
-dynamodb = boto3.resource('dynamodb', region_name=REGION)
-source_table = dynamodb.Table(SOURCE_TABLE_NAME)
-target_table = dynamodb.Table(TARGET_TABLE_NAME)
+# AWS clients and tables are created on first use, from one shared session and connection pool
+source_table = lazy_table(SOURCE_TABLE_NAME, REGION)
+target_table = lazy_table(TARGET_TABLE_NAME, REGION)
 
 # Standard deserializer from boto3
 deserializer = TypeDeserializer()
@@ -37,59 +55,117 @@ def deserialize_item(raw_item):
     """Convert a raw DynamoDB item (with type wrappers) into a plain Python dict."""
     return {key: custom_deserialize(val) for key, val in raw_item.items()}
 
-def transform_item(item):
+# Fields copied unchanged into the new table (the old event_id is dropped)
+FIELDS_TO_COPY = [
+    "user_id", "event", "device_id", "event_detail", "event_detail_2", "event_detail_3",
+    "event_type", "location_id", "section", "section_level", "session_id", "timestamp"
+]
+
+MAPPING = {name: field(name) for name in FIELDS_TO_COPY}
+
+transform_item = compile_mapping(MAPPING)
+# Wire-format version of transform_item: copies the same fields as DynamoDB
+# JSON attribute values, without building Python objects
+transform_wire_item = compile_wire_mapping(MAPPING)
+
+def migrate_items(incremental=False, change_feed=None):
     """
-    Transform the old user action item to the new schema.
-    - Copies over user_id, event, device_id, event_detail, event_detail_2, event_detail_3,
-      event_type, location_id, section, section_level, session_id, and timestamp.
-    - Ignores the old event_id field.
+    Copy the whole table by default.
+    - incremental=True only migrates items whose timestamp is at or after the
+      high-water mark left by the last completed run (its start time, less a
+      clock-skew margin).
+    - change_feed replays changes instead of scanning: "stream" reads the source
+      table's DynamoDB Stream, any other value is the path of a JSON lines file
+      of stream records (a local stand-in for testing).
     """
-    new_item = {
-        "user_id": item.get("user_id", ""),
-        "event": item.get("event", ""),
-        "device_id": item.get("device_id", ""),
-        "event_detail": item.get("event_detail", ""),
-        "event_detail_2": item.get("event_detail_2", ""),
-        "event_detail_3": item.get("event_detail_3", ""),
-        "event_type": item.get("event_type", ""),
-        "location_id": item.get("location_id", ""),
-        "section": item.get("section", ""),
-        "section_level": item.get("section_level", ""),
-        "session_id": item.get("session_id", ""),
-        "timestamp": item.get("timestamp", "")
-    }
-    return new_item
-
-def migrate_items():
     try:
         print("Starting user actions migration...")
-        all_items = []
-        response = source_table.scan()
-        all_items.extend(response.get("Items", []))
-        while "LastEvaluatedKey" in response:
-            response = source_table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-            all_items.extend(response.get("Items", []))
-        print(f"Found {len(all_items)} items in the source table.\n")
+        watermark = Watermark(SOURCE_TABLE_NAME, TARGET_TABLE_NAME)
         
-        # Deserialize items
-        deserialized_items = [deserialize_item(raw) for raw in all_items]
+        if change_feed:
+            # Change feeds always apply to the live table, paced to a share of its capacity
+            write_controller = CapacityController.for_writes(target_table, CAPACITY_SHARE, WRITE_WORKERS)
+            progress = ProgressReporter(TARGET_TABLE_NAME)
+            if change_feed == "stream":
+                feed = StreamChangeFeed(source_table, watermark)
+            else:
+                feed = FileChangeFeed(change_feed, watermark)
+            
+            def on_change(count, record, new_item):
+                progress.update(count)
+            
+            total = migrate_changes(feed, transform_item, target_table, watermark, on_change, write_controller)
+            progress.close()
+            print(f"\nApplied {total} changes from the change feed.")
+            print(f"Write capacity: {write_controller.summary()}")
+            print("\nMigration completed successfully.")
+            return total
         
-        # Optional: Print one deserialized item for debugging.
-        if deserialized_items:
-            print("-- Example deserialized item --")
-            print(json.dumps(deserialized_items[0], indent=2))
+        scan_kwargs, mode = None, None
+        if SOURCE_EXPORT:
+            if incremental:
+                print("Reading an export snapshot; incremental filtering does not apply.")
+        else:
+            # An incremental scan still reads the table, but only items at or after the
+            # mark are returned, deserialized, transformed and written.
+            if incremental and watermark.mark is not None:
+                print(f"Migrating items with {TIMESTAMP_ATTRIBUTE} >= {watermark.mark}")
+                if WIRE_FORMAT:
+                    scan_kwargs = {
+                        "FilterExpression": "#ts >= :mark",
+                        "ExpressionAttributeNames": {"#ts": TIMESTAMP_ATTRIBUTE},
+                        "ExpressionAttributeValues": {":mark": to_wire(watermark.mark)}
+                    }
+                else:
+                    scan_kwargs = {"FilterExpression": Attr(TIMESTAMP_ATTRIBUTE).gte(watermark.mark)}
+                mode = "incremental"
+            elif incremental:
+                print("No high-water mark from a completed run yet; migrating the whole table.")
+            # The next mark is this run's start, since items written while the scan runs
+            # can land in segments already read
+            watermark.begin(TIMESTAMP_UNITS_PER_SECOND)
         
-        # Transform and write items to the target table.
-        with target_table.batch_writer() as batch:
-            for idx, item in enumerate(deserialized_items):
-                new_item = transform_item(item)
-                batch.put_item(Item=new_item)
-                print(f"Migrated {idx+1}/{len(deserialized_items)}: user_id={new_item.get('user_id')}, event={new_item.get('event')}")
+        def on_migrated(count, item, new_item):
+            # Optional: Print the first deserialized item for debugging.
+            if count == 1:
+                print("-- Example deserialized item --")
+                print(json.dumps(item, indent=2, default=str))
+            if SOURCE_EXPORT:
+                # An export is a snapshot, so nothing can appear behind its newest item
+                timestamp = new_item[TIMESTAMP_ATTRIBUTE]
+                watermark.observe(from_wire(timestamp) if WIRE_FORMAT else timestamp)
         
-        print("\nMigration completed successfully.")
+        total = run_migration(
+            source_table, target_table, transform_wire_item if WIRE_FORMAT else transform_item,
+            FIELDS_TO_COPY, TOTAL_SEGMENTS,
+            write_workers=WRITE_WORKERS,
+            capacity_share=CAPACITY_SHARE,
+            source_export=SOURCE_EXPORT,
+            # Pure field projection: scan and write DynamoDB JSON through the low-level client
+            deserialize=deserialize_item,
+            wire_deserialize=None if WIRE_FORMAT else deserialize_item,
+            scan_wire=WIRE_FORMAT,
+            write_wire=WIRE_FORMAT,
+            scan_kwargs=scan_kwargs,
+            checkpoint_mode=mode,
+            on_migrated=on_migrated,
+            import_output_dir=IMPORT_OUTPUT_DIR,
+            # Scan order puts a user's actions next to each other; spread them over
+            # the batches so a heavy user's partition does not throttle every request
+            spreader=PartitionSpreader("user_id") if SPREAD_PARTITIONS else None
+        )
+        watermark.advance()
+        watermark.save()
+        return total
     
     except ClientError as e:
         print("An error occurred:", e.response["Error"]["Message"])
 
 if __name__ == "__main__":
-    migrate_items()
+    parser = argparse.ArgumentParser(description="Migrate user actions to the new table.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only migrate items at or after the last high-water mark")
+    parser.add_argument("--change-feed", metavar="SOURCE",
+                        help="replay changes from 'stream' (the table's DynamoDB Stream) or a JSON lines file")
+    args = parser.parse_args()
+    migrate_items(incremental=args.incremental, change_feed=args.change_feed)
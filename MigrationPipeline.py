@@ -0,0 +1,263 @@
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from BatchWriter import DEFAULT_WRITE_WORKERS, ConcurrentBatchWriter
+from BulkImport import BulkImportSink
+from Checkpoint import PAGES_PER_CHECKPOINT, Checkpoint
+from ExportReader import export_files, read_export
+from Instrumentation import ProgressReporter, carry_metrics, metrics
+from ParallelScan import parallel_scan, projection
+from RateController import CapacityController
+from TransformPool import TransformPool
+from WireFormat import WireTable
+
+def stream_items(pages, deserialize=None):
+    """
+    Yield source items one at a time from an iterable of scan pages.
+    Only the page currently being consumed is held in memory; if deserialize
+    is given it is applied to each item as it is yielded.
+    """
+    for page in pages:
+        for raw_item in page:
+            yield deserialize(raw_item) if deserialize else raw_item
+
+def timed(stage, fn):
+    """Wrap a one-item function so every call is counted and timed under stage."""
+    def timed_fn(item):
+        start = time.perf_counter()
+        result = fn(item)
+        metrics.observe(stage, time.perf_counter() - start)
+        metrics.count(stage)
+        return result
+    return timed_fn
+
+def transform_concurrently(items, transform, workers):
+    """
+    Yield (item, transform(item)) pairs in input order, running up to
+    2 * workers transforms at once. Useful when transform blocks on I/O
+    such as AWS Translate calls.
+    """
+    transform = carry_metrics(transform)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transform") as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.submit(transform, item)))
+            if len(pending) >= workers * 2:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+
+def migrate_stream(items, transform, target_table, on_migrated=None, transform_workers=1,
+                   start_count=0, write_workers=DEFAULT_WRITE_WORKERS, write_controller=None,
+                   deserialize=None, transform_pool=None, sink=None, index=None, encoder=None,
+                   spreader=None):
+    """
+    Transform each item and write it as soon as it arrives, so nothing waits
+    for the scan to finish. Writes go through a ConcurrentBatchWriter with
+    write_workers BatchWriteItem requests in flight, paced by write_controller
+    if given.
+    With transform_workers > 1, several items are transformed concurrently.
+    With a transform_pool (TransformPool), deserialize and transform run in
+    its worker processes and on_migrated receives the raw item.
+    With a sink (BulkImportSink), items go to import files instead of the
+    target table.
+    With an index (ContentIndex), unchanged items are dropped before they are
+    deserialized, and the rest are recorded once the writer has flushed them.
+    With an encoder (ItemEncoder), large attributes are compressed before
+    the write and items over the size limit are reported and left out.
+    With a spreader (PartitionSpreader), writes are interleaved across
+    partition keys before they are batched.
+    on_migrated(count, item, new_item) is called after every put, with count
+    continuing from start_count.
+    Returns the number of items written.
+    """
+    if index is not None:
+        items = index.changed(items)
+    if transform_pool is not None:
+        transformed = transform_pool.transform(items, transform, deserialize)
+    else:
+        transform = timed("transform", transform)
+        if deserialize:
+            deserialize = timed("deserialize", deserialize)
+            items = (deserialize(item) for item in items)
+        if transform_workers > 1:
+            transformed = transform_concurrently(items, transform, transform_workers)
+        else:
+            transformed = ((item, transform(item)) for item in items)
+    if encoder is not None:
+        encode = timed("encode", encoder.encode)
+
+    count = 0
+    if sink is not None:
+        writer = sink.writer()
+    elif spreader is not None:
+        writer = spreader.writer(target_table, write_workers, write_controller)
+    else:
+        writer = ConcurrentBatchWriter(target_table, write_workers, controller=write_controller)
+    with writer as batch:
+        for item, new_item in transformed:
+            if encoder is not None:
+                new_item = encode(new_item)
+                if new_item is None:
+                    continue
+            batch.put_item(Item=new_item)
+            count += 1
+            if on_migrated:
+                on_migrated(start_count + count, item, new_item)
+    if index is not None:
+        index.commit()
+    return count
+
+def migrate_pages(pages, transform, target_table, deserialize=None, on_migrated=None,
+                  transform_workers=1, checkpoint=None, pages_per_checkpoint=PAGES_PER_CHECKPOINT,
+                  write_workers=DEFAULT_WRITE_WORKERS, write_controller=None, transform_pool=None,
+                  sink=None, index=None, encoder=None, spreader=None):
+    """
+    Stream scan pages into the target table.
+    With a checkpoint, pages are written in windows of pages_per_checkpoint:
+    each window's writer is closed, flushing every put, before the
+    window's LastEvaluatedKeys are saved, so a restart never skips an item
+    that was not written.
+    Returns the number of items written by this run.
+    """
+    if checkpoint is None:
+        return migrate_stream(stream_items(pages), transform, target_table,
+                              on_migrated, transform_workers, write_workers=write_workers,
+                              write_controller=write_controller, deserialize=deserialize,
+                              transform_pool=transform_pool, sink=sink, index=index, encoder=encoder,
+                              spreader=spreader)
+
+    pages = iter(pages)
+    total = 0
+    while True:
+        finished = []
+
+        def window_items():
+            for page in itertools.islice(pages, pages_per_checkpoint):
+                yield from page
+                # Only the page's position is kept, not its items
+                finished.append((page.segment, page.next_key, len(page)))
+
+        total += migrate_stream(window_items(), transform, target_table, on_migrated,
+                                transform_workers, checkpoint.items_written, write_workers,
+                                write_controller, deserialize, transform_pool, sink, index, encoder,
+                                spreader)
+        if not finished:
+            return total
+        for segment, next_key, items in finished:
+            checkpoint.record(segment, next_key, items)
+        checkpoint.save()
+
+def run_migration(source_table, target_table, transform, fields, total_segments, write_workers=DEFAULT_WRITE_WORKERS,
+                  capacity_share=0.5, source_export=None, deserialize=None, wire_deserialize=None,
+                  scan_wire=False, write_wire=False, scan_kwargs=None, checkpoint_mode=None, on_migrated=None,
+                  transform_workers=1, transform_processes=0, import_output_dir=None, index=None, encoder=None,
+                  spreader=None, reports=None):
+    """
+    Run one migration from end to end: read the source, stream it through
+    migrate_pages and print what the run did. Returns the number of items
+    written.
+    - The source is a parallel scan of source_table over total_segments
+      segments, fetching only fields, or the DynamoDB export at
+      source_export. An export's data files are its checkpoint segments and
+      use no read capacity.
+    - deserialize applies to items scanned through source_table;
+      wire_deserialize to DynamoDB JSON items, from an export or a scan with
+      scan_wire (through the low-level client). write_wire writes the
+      transform's DynamoDB JSON items through the low-level client.
+    - scan_kwargs (e.g. a FilterExpression) are added to the scan; its
+      ExpressionAttributeNames are merged with the projection's.
+      checkpoint_mode keeps the checkpoints of such scans apart.
+    - Reads and writes are paced to capacity_share of each table's capacity.
+    - With import_output_dir (an initial load), items are written as
+      ImportTable files there instead of calling BatchWriteItem. A fresh
+      (not resumed) import run clears index.
+    - transform_processes > 0 runs deserialize and transform in a
+      TransformPool. index, encoder and spreader are passed through to
+      migrate_pages, and their summaries are printed.
+    - on_migrated(count, item, new_item) is called after every put, before
+      the progress reporter is updated.
+    - reports maps labels to objects with a summary() method, printed last.
+    """
+    source_name, target_name = source_table.name, target_table.name
+    if source_export:
+        files = export_files(source_export)
+        checkpoint = Checkpoint(source_name, target_name, len(files), mode="export")
+        read_controller = None
+        pages = read_export(files, checkpoint=checkpoint, fields=fields)
+        deserialize = wire_deserialize
+    else:
+        kwargs = projection(fields)
+        if scan_kwargs:
+            names = dict(kwargs["ExpressionAttributeNames"], **scan_kwargs.get("ExpressionAttributeNames", {}))
+            kwargs.update(scan_kwargs, ExpressionAttributeNames=names)
+        checkpoint = Checkpoint(source_name, target_name, total_segments, mode=checkpoint_mode)
+        read_controller = CapacityController.for_reads(source_table, capacity_share, total_segments)
+        pages = parallel_scan(WireTable(source_table) if scan_wire else source_table, total_segments,
+                              checkpoint=checkpoint, controller=read_controller, **kwargs)
+        if scan_wire:
+            deserialize = wire_deserialize
+
+    sink = None
+    if import_output_dir:
+        sink = BulkImportSink(import_output_dir, target_name, wire=write_wire, resume=checkpoint.resumed)
+    write_controller = None
+    if sink is None:
+        write_controller = CapacityController.for_writes(target_table, capacity_share, write_workers)
+    else:
+        spreader = None
+        if index is not None and not checkpoint.resumed:
+            # A fresh import load fills a new table, so every item goes into the files
+            index.clear()
+
+    # Progress and per-stage latencies are reported every few seconds, not per item
+    progress = ProgressReporter(target_name)
+
+    def report_progress(count, item, new_item):
+        if on_migrated:
+            on_migrated(count, item, new_item)
+        progress.update(count)
+
+    def run(transform_pool=None):
+        return migrate_pages(
+            pages, transform, WireTable(target_table) if write_wire else target_table,
+            deserialize=deserialize,
+            on_migrated=report_progress,
+            transform_workers=transform_workers,
+            checkpoint=checkpoint,
+            write_workers=write_workers,
+            write_controller=write_controller,
+            transform_pool=transform_pool,
+            sink=sink,
+            index=index,
+            encoder=encoder,
+            spreader=spreader
+        )
+
+    if transform_processes:
+        with TransformPool(transform_processes) as transform_pool:
+            total = run(transform_pool)
+    else:
+        total = run()
+    checkpoint.complete()
+    progress.close()
+
+    print(f"\nMigrated {total} items from the source table.")
+    summaries = {
+        "Read capacity": read_controller,
+        "Write capacity": write_controller,
+        "Import files": sink,
+        "Content index": index,
+        "Item sizes": encoder,
+        "Partition spreading": spreader
+    }
+    summaries.update(reports or {})
+    for label, reporter in summaries.items():
+        if reporter is not None:
+            print(f"{label}: {reporter.summary()}")
+    print("\nMigration completed successfully.")
+    return total
@@ -1,16 +1,24 @@
-import boto3
 from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
+from AwsClients import lazy_table
+from MigrationPipeline import run_migration
+from SchemaMapping import compile_mapping, compile_wire_mapping, constant, field
+
 # Configuration – update these values as needed
 REGION = 'us-east-1'
 SOURCE_TABLE_NAME = 'dev-languageApp-Notificationsv2'    # Adjust the source table name if necessary
 TARGET_TABLE_NAME = 'juno-middleware-languageApp-Notificationsv3'  # The target table
+TOTAL_SEGMENTS = 2  # Number of parallel scan workers for the source table
+WRITE_WORKERS = 2  # BatchWriteItem requests kept in flight against the target table
+CAPACITY_SHARE = 0.5  # Share of each table's read/write capacity the migration may consume
+WIRE_FORMAT = True  # Copy DynamoDB JSON attribute values directly, skipping deserialization
+SOURCE_EXPORT = None  # Local DynamoDB export (directory, glob or .json.gz file) to read instead of scanning
+IMPORT_OUTPUT_DIR = None  # Write ImportTable files here instead of writing to the target table (initial load)
 
-# Initialize DynamoDB resource and tables
-dynamodb = boto3.resource('dynamodb', region_name=REGION)
-source_table = dynamodb.Table(SOURCE_TABLE_NAME)
-target_table = dynamodb.Table(TARGET_TABLE_NAME)
+# AWS clients and tables are created on first use, from one shared session and connection pool
+source_table = lazy_table(SOURCE_TABLE_NAME, REGION)
+target_table = lazy_table(TARGET_TABLE_NAME, REGION)
 
 # Deserializer to convert raw DynamoDB JSON (with "S", etc.) to Python types
 deserializer = TypeDeserializer()
@@ -21,63 +29,37 @@ def deserialize_item(item):
     """
     return {k: deserializer.deserialize(v) for k, v in item.items()}
 
-def transform_item(item):
-    """
-    Transform a deserialized source item into the target item schema.
-    Only the following fields are migrated:
-      - Identifier
-      - Language
-      - Type
-      - Title
-      - Body
-      - Date_Started
-      - Date_Retired
-      - isActive
-      - Use_Case
-    """
-    new_item = {
-        "Identifier": item.get("Identifier", ""),
-        "Language": item.get("Language", ""),
-        "Type": item.get("Type", ""),
-        "Title": item.get("Title", ""),
-        "Body": item.get("Body", ""),
-        "Date_Started": item.get("Date_Started", ""),
-        "Date_Retired": item.get("Date_Retired", ""),
-        "isActive": item.get("isActive", ""),
-        "Use_Case": item.get("Use_Case", ""),
-        "Lang_Code": "EN"
-    }
-    return new_item
+# Fields copied unchanged into the new table
+FIELDS_TO_COPY = [
+    "Identifier", "Language", "Type", "Title", "Body",
+    "Date_Started", "Date_Retired", "isActive", "Use_Case"
+]
+
+# Only FIELDS_TO_COPY are migrated, plus a Lang_Code of "EN"
+MAPPING = {name: field(name) for name in FIELDS_TO_COPY}
+MAPPING["Lang_Code"] = constant("EN")
+
+transform_item = compile_mapping(MAPPING)
+# Wire-format version of transform_item: copies the same fields as DynamoDB
+# JSON attribute values, without building Python objects
+transform_wire_item = compile_wire_mapping(MAPPING)
 
 def migrate_items():
     try:
         print("Starting migration for Notifications...")
-        response = source_table.scan()
-        items = response.get('Items', [])
-        
-        # If items are in raw DynamoDB format (with "S", etc.), deserialize them
-        if items and isinstance(next(iter(items[0].values())), dict) and 'S' in next(iter(items[0].values())):
-            print("Deserializing items from raw DynamoDB format...")
-            items = [deserialize_item(item) for item in items]
-        
-        # Handle pagination
-        while 'LastEvaluatedKey' in response:
-            response = source_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-            new_items = response.get('Items', [])
-            if new_items and isinstance(next(iter(new_items[0].values())), dict) and 'S' in next(iter(new_items[0].values())):
-                new_items = [deserialize_item(item) for item in new_items]
-            items.extend(new_items)
-        
-        print(f"Found {len(items)} items in the source table.")
-        
-        # Write to target table using batch_writer for efficiency
-        with target_table.batch_writer() as batch:
-            for item in items:
-                new_item = transform_item(item)
-                batch.put_item(Item=new_item)
-                print(f"Migrated item Identifier: {new_item.get('Identifier')}, Language: {new_item.get('Language')}")
-                
-        print("Migration completed successfully.")
+        return run_migration(
+            source_table, target_table, transform_wire_item if WIRE_FORMAT else transform_item,
+            FIELDS_TO_COPY, TOTAL_SEGMENTS,
+            write_workers=WRITE_WORKERS,
+            capacity_share=CAPACITY_SHARE,
+            source_export=SOURCE_EXPORT,
+            # Pure field projection: scan and write DynamoDB JSON through the low-level client.
+            # Otherwise only export items (always DynamoDB JSON) are deserialized.
+            wire_deserialize=None if WIRE_FORMAT else deserialize_item,
+            scan_wire=WIRE_FORMAT,
+            write_wire=WIRE_FORMAT,
+            import_output_dir=IMPORT_OUTPUT_DIR
+        )
     
     except ClientError as e:
         print(f"An error occurred: {e.response['Error']['Message']}")
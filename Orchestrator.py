@@ -0,0 +1,214 @@
+import argparse
+import glob
+import importlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from Instrumentation import Metrics, use_metrics
+
+# Orchestrator configuration – adjust as needed
+DEFAULT_BUDGET = 32   # Scan segments + write workers allowed to run at once across all migrations
+# Migrations that must finish before another starts, e.g. {"Passage": ["Vocab"]}
+DEPENDENCIES = {}
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Map migration names to module names: UserMigration.py -> {"User": "UserMigration"}."""
+    modules = sorted(os.path.basename(path)[:-3] for path in glob.glob(os.path.join(directory, "*Migration.py")))
+    return {module[:-len("Migration")]: module for module in modules}
+
+def migration_cost(module):
+    """Threads a migration keeps busy: its scan segments plus its write workers."""
+    return getattr(module, "TOTAL_SEGMENTS", 1) + getattr(module, "WRITE_WORKERS", 1)
+
+def check_dependencies(names, dependencies):
+    """Reject unknown names and cycles in the ordering DAG."""
+    for name, after in dependencies.items():
+        for other in [name] + list(after):
+            if other not in names:
+                raise ValueError(f"Unknown migration {other!r} in the ordering")
+
+    visiting, visited = set(), set()
+    def visit(name, path):
+        if name in visiting:
+            raise ValueError(f"Migration ordering has a cycle: {' -> '.join(path + [name])}")
+        if name in visited:
+            return
+        visiting.add(name)
+        for other in dependencies.get(name, []):
+            visit(other, path + [name])
+        visiting.discard(name)
+        visited.add(name)
+    for name in dependencies:
+        visit(name, [])
+
+class _PrefixedOutput:
+    """
+    stdout wrapper that prefixes each line written by a migration's thread
+    with the migration's name, so concurrent migrations stay readable.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def set_prefix(self, prefix):
+        self._local.prefix = prefix
+        self._local.buffer = ""
+
+    def write(self, text):
+        prefix = getattr(self._local, "prefix", None)
+        if not prefix:
+            with self._lock:
+                return self.stream.write(text)
+        *lines, self._local.buffer = (self._local.buffer + text).split("\n")
+        with self._lock:
+            for line in lines:
+                self.stream.write(f"{prefix}{line}\n")
+        return len(text)
+
+    def close_prefix(self):
+        if getattr(self._local, "buffer", ""):
+            self.write("\n")
+        self._local.prefix = None
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def _run_one(name, module, output):
+    output.set_prefix(f"[{name}] ")
+    start = time.monotonic()
+    try:
+        # Each migration's stages (and its metrics file) count only its own work
+        with use_metrics(Metrics()):
+            total = module.migrate_items()
+        # migrate_items() reports AWS errors itself and returns None
+        status = "ok" if total is not None else "failed"
+        error = None
+    except Exception as e:
+        total, status, error = None, "failed", f"{type(e).__name__}: {e}"
+        print(f"Migration failed: {error}")
+    finally:
+        output.close_prefix()
+    return {"status": status, "items": total, "seconds": time.monotonic() - start, "error": error}
+
+def run_migrations(names, budget=DEFAULT_BUDGET, dependencies=None, available=None):
+    """
+    Run the named migrations concurrently in this process, starting each one
+    once the migrations it depends on have succeeded and its cost fits in
+    the remaining budget (a migration costing more than the whole budget
+    runs on its own). Migrations share the process's boto3 session, so
+    credentials are resolved once, but each records its stage metrics into
+    its own registry, so progress lines and metrics files are per migration.
+    A migration whose dependency failed is skipped.
+    Returns {name: result} in completion order.
+    """
+    available = available or discover_migrations()
+    dependencies = {name: [d for d in after if d in names] for name, after in (dependencies or {}).items()
+                    if name in names}
+    check_dependencies(names, dependencies)
+
+    modules = {name: importlib.import_module(available[name]) for name in names}
+    costs = {name: min(migration_cost(module), budget) for name, module in modules.items()}
+    results = {}
+    pending = list(names)
+    running = {}
+    used = 0
+
+    output = _PrefixedOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="migration") as pool:
+            while pending or running:
+                for name in list(pending):
+                    after = dependencies.get(name, [])
+                    if any(results.get(other, {}).get("status") in ("failed", "skipped") for other in after):
+                        pending.remove(name)
+                        results[name] = {"status": "skipped", "items": None, "seconds": 0.0,
+                                         "error": "a migration it depends on did not succeed"}
+                        continue
+                    if all(results.get(other, {}).get("status") == "ok" for other in after) \
+                            and used + costs[name] <= budget:
+                        pending.remove(name)
+                        used += costs[name]
+                        print(f"Starting {name} (cost {costs[name]}, budget {used}/{budget} in use)")
+                        running[pool.submit(_run_one, name, modules[name], output)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    used -= costs[name]
+                    results[name] = future.result()
+    finally:
+        sys.stdout = output.stream
+    return results
+
+def print_summary(results, elapsed):
+    print(f"\n{'Migration':<14}{'Status':<10}{'Items':>10}{'Seconds':>10}{'Items/s':>10}")
+    total_items = 0
+    for name, result in results.items():
+        items = result["items"] or 0
+        total_items += items
+        rate = items / result["seconds"] if result["seconds"] else 0
+        print(f"{name:<14}{result['status']:<10}{items:>10}{result['seconds']:>10.1f}{rate:>10.0f}")
+        if result["error"]:
+            print(f"{'':<14}{result['error']}")
+    print(f"\n{total_items} items migrated in {elapsed:.1f}s "
+          f"(sum of migration times {sum(r['seconds'] for r in results.values()):.1f}s).")
+
+def parse_after(values):
+    """Parse --after NAME:DEP[,DEP...] options into {NAME: [DEP, ...]}."""
+    dependencies = {}
+    for value in values:
+        name, _, after = value.partition(":")
+        if not after:
+            raise ValueError(f"--after expects NAME:DEPENDENCY[,DEPENDENCY...], got {value!r}")
+        dependencies.setdefault(name, []).extend(other for other in after.split(",") if other)
+    return dependencies
+
+def main():
+    available = discover_migrations()
+    parser = argparse.ArgumentParser(description="Run several table migrations concurrently in one process.")
+    parser.add_argument("migrations", nargs="*", metavar="MIGRATION",
+                        help=f"Migrations to run (default: all of {', '.join(available)})")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET,
+                        help="Scan segments + write workers allowed to run at once")
+    parser.add_argument("--after", action="append", default=[], metavar="NAME:DEP[,DEP]",
+                        help="Run NAME only after DEP has succeeded (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List the discovered migrations and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, module in available.items():
+            print(f"{name:<14}{module}.py")
+        return
+
+    names = args.migrations or list(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown migration(s): {', '.join(unknown)}")
+
+    dependencies = {name: list(after) for name, after in DEPENDENCIES.items()}
+    try:
+        for name, after in parse_after(args.after).items():
+            dependencies.setdefault(name, []).extend(after)
+        check_dependencies(list(available), dependencies)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.monotonic()
+    results = run_migrations(names, args.budget, dependencies, available)
+    print_summary(results, time.monotonic() - start)
+    if any(result["status"] != "ok" for result in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
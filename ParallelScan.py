@@ -0,0 +1,148 @@
+import queue
+import threading
+
+from Instrumentation import carry_metrics, metrics
+from RateController import consumed_units
+
+# Default number of scan segments; each migration can override this per table
+DEFAULT_TOTAL_SEGMENTS = 4
+# Maximum number of pages buffered between the scan workers and the consumer
+MAX_BUFFERED_PAGES = 16
+
+# Marker a worker puts on the queue when its segment is exhausted
+_SEGMENT_DONE = object()
+
+def projection(fields):
+    """
+    Scan arguments that fetch only the given attributes. Every name goes
+    through a placeholder, so reserved words (timestamp, event, section, ...)
+    and names such as "#name" are safe.
+    """
+    names = {f"#p{i}": field for i, field in enumerate(fields)}
+    return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+
+class ScanPage(list):
+    """
+    One page of scanned items. Behaves like a plain list of items, and also
+    records the segment it came from and the key that segment continues from
+    (next_key is None once the segment is exhausted), and the read capacity
+    the request consumed if it asked for ReturnConsumedCapacity.
+    """
+    def __init__(self, items, segment=0, next_key=None, consumed=0):
+        super().__init__(items)
+        self.segment = segment
+        self.next_key = next_key
+        self.consumed = consumed
+
+def _scan_page(client, kwargs, controller):
+    """Issue one Scan request, paced and accounted for by the controller if given."""
+    if controller is None:
+        with metrics.timer("scan"):
+            return client.scan(**kwargs)
+    controller.acquire()
+    consumed = 0
+    try:
+        kwargs["Limit"] = controller.page_limit
+        with metrics.timer("scan"):
+            response = client.scan(**kwargs)
+        consumed = consumed_units(response)
+        return response
+    finally:
+        controller.release(consumed)
+
+def scan_segment(table, segment=0, total_segments=1, exclusive_start_key=None, controller=None, **scan_kwargs):
+    """
+    Yield the pages of one segment of a table scan, starting after
+    exclusive_start_key if given. With a CapacityController, every request
+    waits for a slot, uses the controller's page Limit and reports its
+    consumed read capacity.
+    Requests go through the table's client, which is thread-safe (resource
+    objects are not) and still carries the resource's type conversion, so
+    callers get the same items Table.scan() would return.
+    """
+    client = table.meta.client
+    kwargs = dict(scan_kwargs, TableName=table.name)
+    if total_segments > 1:
+        kwargs["Segment"] = segment
+        kwargs["TotalSegments"] = total_segments
+    if exclusive_start_key:
+        kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+    if controller:
+        kwargs["ReturnConsumedCapacity"] = "TOTAL"
+
+    while True:
+        response = _scan_page(client, kwargs, controller)
+        next_key = response.get("LastEvaluatedKey")
+        items = response.get("Items", [])
+        metrics.count("scan", len(items))
+        yield ScanPage(items, segment, next_key, consumed_units(response))
+        if next_key is None:
+            break
+        kwargs["ExclusiveStartKey"] = next_key
+
+def parallel_scan(table, total_segments=DEFAULT_TOTAL_SEGMENTS, checkpoint=None, controller=None, **scan_kwargs):
+    """
+    Scan a table with one worker thread per segment and yield pages as they arrive.
+    Pages from different segments are interleaved, so item order is not preserved.
+    With a checkpoint, finished segments are skipped and the others resume from
+    their saved keys. With a CapacityController, its concurrency limit decides
+    how many segments read at once.
+    Any error raised by a worker (e.g. ClientError) is re-raised to the caller.
+    """
+    segments = list(range(total_segments))
+    if checkpoint:
+        segments = [segment for segment in segments if not checkpoint.is_done(segment)]
+
+    def start_key(segment):
+        return checkpoint.start_key(segment) if checkpoint else None
+
+    if total_segments <= 1:
+        if segments:
+            yield from scan_segment(table, exclusive_start_key=start_key(0), controller=controller, **scan_kwargs)
+        return
+
+    pages = queue.Queue(maxsize=MAX_BUFFERED_PAGES)
+    stop = threading.Event()
+
+    def put(entry):
+        # Block while the queue is full, but give up once the consumer has stopped
+        while not stop.is_set():
+            try:
+                pages.put(entry, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def worker(segment):
+        try:
+            for page in scan_segment(table, segment, total_segments, start_key(segment), controller, **scan_kwargs):
+                if stop.is_set():
+                    return
+                put(page)
+        except Exception as e:
+            put(e)
+        finally:
+            put(_SEGMENT_DONE)
+
+    threads = [
+        threading.Thread(target=carry_metrics(worker), args=(segment,), daemon=True)
+        for segment in segments
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        remaining = len(threads)
+        while remaining:
+            entry = pages.get()
+            if entry is _SEGMENT_DONE:
+                remaining -= 1
+            elif isinstance(entry, Exception):
+                raise entry
+            else:
+                yield entry
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
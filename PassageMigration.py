@@ -1,18 +1,35 @@
-import boto3
 import json
 from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
+from AwsClients import lazy_client, lazy_table
+from ContentIndex import ContentIndex
+from ItemEncoding import ItemEncoder
+from MigrationPipeline import run_migration
+from SchemaMapping import compile_mapping, computed, constant, field, json_field, source_fields, translated
+from TranslationBatcher import TranslationBatcher
+from TranslationCache import translation_cache
+from TranslationExecutor import TranslationExecutor
+from TranslationLimiter import translation_limiter
+
 # AWS Configuration
 REGION = 'us-east-1'
 SOURCE_TABLE_NAME = 'dev-languageApp-spanishPassages'           # Adjust to actual source table name
 TARGET_TABLE_NAME = 'juno-middleware-languageApp-ChatterBoxPassages'  # Target table name
+TOTAL_SEGMENTS = 2  # Number of parallel scan workers for the source table
+WRITE_WORKERS = 2  # BatchWriteItem requests kept in flight against the target table
+CAPACITY_SHARE = 0.5  # Share of each table's read/write capacity the migration may consume
+TRANSFORM_WORKERS = 4  # Items transformed (and translated) concurrently
+SOURCE_EXPORT = None  # Local DynamoDB export (directory, glob or .json.gz file) to read instead of scanning
+IMPORT_OUTPUT_DIR = None  # Write ImportTable files here instead of writing to the target table (initial load)
+SKIP_UNCHANGED = True  # Skip items whose source content and transform version match the last run
+TRANSFORM_VERSION = 1  # Bump whenever transform_item changes so every item is rewritten
+COMPRESS_LARGE_FIELDS = False  # Store large word timings as compressed Binary; only once the app reads them with ItemEncoding.decode_value
 
-# Initialize AWS services
-dynamodb = boto3.resource('dynamodb', region_name=REGION)
-translate = boto3.client('translate', region_name=REGION)
-source_table = dynamodb.Table(SOURCE_TABLE_NAME)
-target_table = dynamodb.Table(TARGET_TABLE_NAME)
+# AWS clients and tables are created on first use, from one shared session and connection pool
+translate = lazy_client('translate', REGION)
+source_table = lazy_table(SOURCE_TABLE_NAME, REGION)
+target_table = lazy_table(TARGET_TABLE_NAME, REGION)
 
 # Deserializer for DynamoDB JSON format
 deserializer = TypeDeserializer()
@@ -31,121 +48,129 @@ def deserialize_item(item):
 
     return deserialized
 
+def send_translation(text, source_lang, target_lang):
+    """Send one TranslateText request, paced to the Translate quota and retried when throttled."""
+    return translation_limiter.send(translate, text, source_lang, target_lang)
+
+# Packs short strings translated at the same time (titles, answers, questions) into one request
+translation_batcher = TranslationBatcher(send_translation)
+
 def translate_text(text, source_lang="es", target_lang="en"):
     """Translate text using AWS Translate."""
     if not text.strip():
         return ""
     
+    cached = translation_cache.get(text, source_lang, target_lang)
+    if cached is not None:
+        return cached
+    
     try:
-        response = translate.translate_text(
-            Text=text,
-            SourceLanguageCode=source_lang,
-            TargetLanguageCode=target_lang
-        )
-        return response["TranslatedText"]
+        translated = translation_batcher.translate(text, source_lang, target_lang)
+        translation_cache.put(text, source_lang, target_lang, translated)
+        return translated
     except ClientError as e:
         print(f"Translation error: {e.response['Error']['Message']}")
+        translation_limiter.fallback()
         return text  # Fallback to original text if translation fails
 
+# Shared pool so an item's translations (and several items' translations) run concurrently
+translation_executor = TranslationExecutor(translate_text)
+
 def process_options(options_list):
     """Convert a list of options to a JSON string."""
     if not options_list:
         return "[]"
     return json.dumps([opt for opt in options_list])
 
-def transform_item(item):
-    """Transform a deserialized source item into the target schema."""
-    
-    # Translate passage metadata to English
-    base_lang_title = translate_text(item.get("#name", ""))
-    base_lang_description = translate_text(item.get("Description", ""))
-    base_lang_passage = translate_text(item.get("Passage", ""))
-    base_lang_answers = [
-        translate_text(item.get("Answer_1", "")),
-        translate_text(item.get("Answer_2", "")),
-        translate_text(item.get("Answer_3", "")),
-        translate_text(item.get("Answer_4", ""))
-    ]
-    base_lang_questions = [
-        translate_text(item.get("Question_1", "")),
-        translate_text(item.get("Question_2", "")),
-        translate_text(item.get("Question_3", "")),
-        translate_text(item.get("Question_4", ""))
-    ]
-    
-    # Extract multiple-choice options and convert to JSON
-    base_lang_options = [
-        process_options(item.get("Options_1", [])),
-        process_options(item.get("Options_2", [])),
-        process_options(item.get("Options_3", [])),
-        process_options(item.get("Options_4", []))
-    ]
-    
-    # Extract passage word timings and convert to JSON string
-    passage_word_timings = json.dumps(item.get("Passage_Word_Timings", "[]"))
+# The target schema; passage metadata is translated to English, and all of an
+# item's translations are requested at once
+MAPPING = {
+    "Identifier": field("Identifier"),
+    "Level": field("Level"),
+    "Genre": field("Genre"),
 
-    new_item = {
-        "Identifier": item.get("Identifier", ""),
-        "Level": item.get("Level", ""),
-        "Genre": item.get("Genre", ""),
-        
-        "Base_Lang_Code": "EN",
-        "Base_Lang_Title": base_lang_title,
-        "Base_Lang_Description": base_lang_description,
-        "Base_Lang_Answer_1": base_lang_answers[0],
-        "Base_Lang_Answer_2": base_lang_answers[1],
-        "Base_Lang_Answer_3": base_lang_answers[2],
-        "Base_Lang_Answer_4": base_lang_answers[3],
-        "Base_Lang_Options_1": base_lang_options[0],
-        "Base_Lang_Options_2": base_lang_options[1],
-        "Base_Lang_Options_3": base_lang_options[2],
-        "Base_Lang_Options_4": base_lang_options[3],
-        "Base_Lang_Passage": base_lang_passage,
-        "Base_Lang_Question_1": base_lang_questions[0],
-        "Base_Lang_Question_2": base_lang_questions[1],
-        "Base_Lang_Question_3": base_lang_questions[2],
-        "Base_Lang_Question_4": base_lang_questions[3],
-
-        "Targ_Lang_Code": "ES",
-        "Targ_Lang_Title": item.get("#name", ""),
-        "Targ_Lang_Description": item.get("Description", ""),
-        "Targ_Lang_Answer_1": item.get("Answer_1", ""),
-        "Targ_Lang_Answer_2": item.get("Answer_2", ""),
-        "Targ_Lang_Answer_3": item.get("Answer_3", ""),
-        "Targ_Lang_Answer_4": item.get("Answer_4", ""),
-        "Targ_Lang_Options_1": process_options(item.get("Options_1", [])),
-        "Targ_Lang_Options_2": process_options(item.get("Options_2", [])),
-        "Targ_Lang_Options_3": process_options(item.get("Options_3", [])),
-        "Targ_Lang_Options_4": process_options(item.get("Options_4", [])),
-        "Targ_Lang_Passage": item.get("Passage", ""),
-        "Targ_Passage_Word_Timings": passage_word_timings,
-        "Targ_Passage_Audio_URL": item.get("Passage_Audio_URL", ""),
-        "Targ_Lang_Question_1": item.get("Question_1", ""),
-        "Targ_Lang_Question_2": item.get("Question_2", ""),
-        "Targ_Lang_Question_3": item.get("Question_3", ""),
-        "Targ_Lang_Question_4": item.get("Question_4", ""),
-        
-        "ImageURL": item.get("ImageUrl", ""),
-        "Prompt": item.get("Prompt", ""),
-        "Section": item.get("Level", "")
-    }
-    return new_item
+    "Base_Lang_Code": constant("EN"),
+    "Base_Lang_Title": translated("#name", "es", "en"),
+    "Base_Lang_Description": translated("Description", "es", "en"),
+    "Base_Lang_Answer_1": translated("Answer_1", "es", "en"),
+    "Base_Lang_Answer_2": translated("Answer_2", "es", "en"),
+    "Base_Lang_Answer_3": translated("Answer_3", "es", "en"),
+    "Base_Lang_Answer_4": translated("Answer_4", "es", "en"),
+    # Multiple-choice options are stored as JSON
+    "Base_Lang_Options_1": computed(process_options, "Options_1", default=[]),
+    "Base_Lang_Options_2": computed(process_options, "Options_2", default=[]),
+    "Base_Lang_Options_3": computed(process_options, "Options_3", default=[]),
+    "Base_Lang_Options_4": computed(process_options, "Options_4", default=[]),
+    "Base_Lang_Passage": translated("Passage", "es", "en"),
+    "Base_Lang_Question_1": translated("Question_1", "es", "en"),
+    "Base_Lang_Question_2": translated("Question_2", "es", "en"),
+    "Base_Lang_Question_3": translated("Question_3", "es", "en"),
+    "Base_Lang_Question_4": translated("Question_4", "es", "en"),
+
+    "Targ_Lang_Code": constant("ES"),
+    "Targ_Lang_Title": field("#name"),
+    "Targ_Lang_Description": field("Description"),
+    "Targ_Lang_Answer_1": field("Answer_1"),
+    "Targ_Lang_Answer_2": field("Answer_2"),
+    "Targ_Lang_Answer_3": field("Answer_3"),
+    "Targ_Lang_Answer_4": field("Answer_4"),
+    "Targ_Lang_Options_1": computed(process_options, "Options_1", default=[]),
+    "Targ_Lang_Options_2": computed(process_options, "Options_2", default=[]),
+    "Targ_Lang_Options_3": computed(process_options, "Options_3", default=[]),
+    "Targ_Lang_Options_4": computed(process_options, "Options_4", default=[]),
+    "Targ_Lang_Passage": field("Passage"),
+    "Targ_Passage_Word_Timings": json_field("Passage_Word_Timings", "[]"),  # Stored as a JSON string
+    "Targ_Passage_Audio_URL": field("Passage_Audio_URL"),
+    "Targ_Lang_Question_1": field("Question_1"),
+    "Targ_Lang_Question_2": field("Question_2"),
+    "Targ_Lang_Question_3": field("Question_3"),
+    "Targ_Lang_Question_4": field("Question_4"),
+
+    "ImageURL": field("ImageUrl"),
+    "Prompt": field("Prompt"),
+    "Section": field("Level")
+}
+
+# Every attribute transform_item reads; scans fetch only these
+SOURCE_FIELDS = source_fields(MAPPING)
+
+# JSON attributes stored as compressed Binary once they are large (see ItemEncoding)
+LARGE_JSON_FIELDS = ["Targ_Passage_Word_Timings"]
+
+transform_item = compile_mapping(MAPPING, translate_many=translation_executor.translate_many)
 
 def migrate_items():
     try:
         print("Starting passage migration...")
-        response = source_table.scan()
-        items = response.get('Items', [])
+        # Every item is sized before it is written: long word timings can be stored compressed,
+        # and items still over the limit are reported instead of failing a batch
+        encoder = ItemEncoder(TARGET_TABLE_NAME, ["Identifier"], LARGE_JSON_FIELDS if COMPRESS_LARGE_FIELDS else [])
         
-        items = [deserialize_item(item) for item in items]
+        index = None
+        if SKIP_UNCHANGED:
+            # Re-runs only transform and write items that changed since they were last written
+            # Passages whose translation fell back to the source text, or that were too large
+            # to write, are retried next run
+            index = ContentIndex(TARGET_TABLE_NAME, ["Identifier"], TRANSFORM_VERSION,
+                                 failures=lambda: translation_limiter.fallbacks + encoder.oversized)
         
-        with target_table.batch_writer() as batch:
-            for item in items:
-                new_item = transform_item(item)
-                batch.put_item(Item=new_item)
-                print(f"Migrated passage: {new_item.get('Identifier')}, Title: {new_item.get('Targ_Lang_Title')}")
-                
-        print("Migration completed successfully.")
+        return run_migration(
+            source_table, target_table, transform_item, SOURCE_FIELDS, TOTAL_SEGMENTS,
+            write_workers=WRITE_WORKERS,
+            capacity_share=CAPACITY_SHARE,
+            source_export=SOURCE_EXPORT,
+            deserialize=deserialize_item,
+            wire_deserialize=deserialize_item,
+            transform_workers=TRANSFORM_WORKERS,
+            import_output_dir=IMPORT_OUTPUT_DIR,
+            index=index,
+            encoder=encoder,
+            reports={
+                "Translation cache": translation_cache,
+                "Translate requests": translation_batcher,
+                "Translate quota": translation_limiter
+            }
+        )
     
     except ClientError as e:
         print(f"An error occurred: {e.response['Error']['Message']}")
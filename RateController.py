@@ -0,0 +1,151 @@
+import math
+import threading
+import time
+
+# Capacity configuration – adjust as needed
+TARGET_SHARE = 0.5            # Fraction of a table's capacity a migration may consume
+ON_DEMAND_READ_UNITS = 12000  # Assumed capacity of an on-demand table without a MaxReadRequestUnits cap
+ON_DEMAND_WRITE_UNITS = 4000  # Assumed capacity of an on-demand table without a MaxWriteRequestUnits cap
+ADJUST_EVERY = 2.0            # Seconds between concurrency / page size adjustments
+MIN_PAGE_LIMIT = 25           # Smallest scan Limit the controller will shrink pages to
+MAX_PAGE_LIMIT = 1000         # Largest scan Limit (1 MB pages usually end sooner)
+
+class AdaptiveGate:
+    """Concurrency limit that can be resized while threads are waiting on it."""
+    def __init__(self, limit):
+        self.max_limit = limit
+        self.limit = limit
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def resize(self, limit):
+        with self._cond:
+            self.limit = max(1, min(self.max_limit, limit))
+            self._cond.notify_all()
+
+class CapacityController:
+    """
+    Holds a table's consumed capacity at a target rate of units per second.
+    Requests take a slot with acquire() and report the ConsumedCapacity of
+    their response with release(). A token bucket paces requests to the
+    target rate, and every ADJUST_EVERY seconds the number of concurrent
+    requests (scan segments or write workers) and the scan page Limit are
+    raised when the table has headroom and cut when it is at budget or
+    throttling.
+    """
+    def __init__(self, units_per_second, max_concurrency, page_limit=None):
+        self.target = units_per_second
+        self.gate = AdaptiveGate(max_concurrency)
+        self.page_limit = page_limit
+        self.consumed_total = 0.0
+        self.throttle_events = 0
+        self._tokens = units_per_second
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_refill = self._started
+        self._last_adjust = self._started
+        self._consumed_since_adjust = 0.0
+        self._throttled_since_adjust = False
+
+    @classmethod
+    def for_reads(cls, table, share=TARGET_SHARE, max_concurrency=1):
+        """Controller for scans of table, sized from its provisioned or on-demand read capacity."""
+        units = _table_capacity(table, "ReadCapacityUnits", "MaxReadRequestUnits", ON_DEMAND_READ_UNITS)
+        return cls(units * share, max_concurrency, MAX_PAGE_LIMIT)
+
+    @classmethod
+    def for_writes(cls, table, share=TARGET_SHARE, max_concurrency=1):
+        """Controller for batch writes to table, sized from its provisioned or on-demand write capacity."""
+        units = _table_capacity(table, "WriteCapacityUnits", "MaxWriteRequestUnits", ON_DEMAND_WRITE_UNITS)
+        return cls(units * share, max_concurrency)
+
+    def _refill(self, now):
+        # Bucket holds at most one second of budget, so bursts stay small
+        self._tokens = min(self.target, self._tokens + (now - self._last_refill) * self.target)
+        self._last_refill = now
+
+    def acquire(self):
+        """Wait for a request slot and for the token bucket to leave debt."""
+        self.gate.acquire()
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens > 0:
+                    return
+                wait = -self._tokens / self.target
+            time.sleep(min(wait, 1.0))
+
+    def release(self, consumed_units):
+        """Charge the capacity a request consumed and free its slot."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= consumed_units
+            self.consumed_total += consumed_units
+            self._consumed_since_adjust += consumed_units
+            if now - self._last_adjust >= ADJUST_EVERY:
+                self._adjust(now)
+        self.gate.release()
+
+    def throttled(self):
+        """Report a throttled request (e.g. UnprocessedItems); backs off at the next adjustment."""
+        with self._lock:
+            self.throttle_events += 1
+            self._throttled_since_adjust = True
+
+    def _adjust(self, now):
+        rate = self._consumed_since_adjust / (now - self._last_adjust)
+        limit = self.gate.limit
+        if self._throttled_since_adjust or rate > self.target * 0.95:
+            # Multiplicative decrease: smaller pages and fewer requests in flight
+            self.gate.resize(math.ceil(limit * 0.75) if limit > 1 else 1)
+            if self.page_limit:
+                self.page_limit = max(MIN_PAGE_LIMIT, self.page_limit // 2)
+        elif rate < self.target * 0.7:
+            # Additive increase while there is headroom
+            self.gate.resize(limit + 1)
+            if self.page_limit:
+                self.page_limit = min(MAX_PAGE_LIMIT, self.page_limit * 2)
+        self._last_adjust = now
+        self._consumed_since_adjust = 0.0
+        self._throttled_since_adjust = False
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        text = (f"{self.consumed_total:.1f} units at {self.consumed_total / elapsed:.1f}/s "
+                f"(target {self.target:.1f}/s), concurrency {self.gate.limit}")
+        if self.page_limit:
+            text += f", page limit {self.page_limit}"
+        if self.throttle_events:
+            text += f", {self.throttle_events} throttled requests"
+        return text
+
+def _table_capacity(table, provisioned_field, on_demand_field, on_demand_default):
+    """Read a table's capacity units per second from DescribeTable."""
+    provisioned = (table.provisioned_throughput or {}).get(provisioned_field) or 0
+    if provisioned > 0:
+        return provisioned
+    on_demand = (getattr(table, "on_demand_throughput", None) or {}).get(on_demand_field) or 0
+    if on_demand > 0:
+        return on_demand
+    return on_demand_default
+
+def consumed_units(response):
+    """Total CapacityUnits reported by a response made with ReturnConsumedCapacity='TOTAL'."""
+    consumed = response.get("ConsumedCapacity")
+    if isinstance(consumed, list):
+        return sum(entry.get("CapacityUnits", 0) for entry in consumed)
+    if consumed:
+        return consumed.get("CapacityUnits", 0)
+    return 0
@@ -0,0 +1,174 @@
+import json
+import sys
+from functools import partial
+
+from WireFormat import to_wire
+
+class Rule:
+    """How one target attribute is built from a source item; made by the functions below."""
+    __slots__ = ("kind", "sources", "default", "value", "fn", "langs", "each")
+
+    def __init__(self, kind, sources=(), default="", value=None, fn=None, langs=None, each=False):
+        self.kind = kind
+        self.sources = sources
+        self.default = default
+        self.value = value
+        self.fn = fn
+        self.langs = langs
+        self.each = each
+
+def field(source, default=""):
+    """The source attribute as it is, or default if the item does not have it."""
+    return Rule("field", (source,), default)
+
+def constant(value):
+    """The same value on every item."""
+    return Rule("constant", value=value)
+
+def first_of(*sources, default=""):
+    """The first source attribute that is set and not empty, else the last one or default."""
+    return Rule("first_of", sources, default)
+
+def computed(fn, *sources, default=""):
+    """fn(*values) of the source attributes, with default for the ones an item does not have."""
+    return Rule("computed", sources, default, fn=fn)
+
+def json_field(source, default="", **json_kwargs):
+    """The source attribute encoded with json.dumps(value, **json_kwargs)."""
+    return computed(partial(json.dumps, **json_kwargs) if json_kwargs else json.dumps, source, default=default)
+
+def translated(source, source_lang, target_lang, default="", each=False, then=None):
+    """
+    The source attribute translated from source_lang to target_lang, or with
+    each=True, a list of its elements translated one by one. then, if given,
+    is applied to the result (e.g. to JSON-encode a translated list).
+    """
+    return Rule("translated", (source,), default, fn=then, langs=(source_lang, target_lang), each=each)
+
+def source_fields(mapping):
+    """Every source attribute a mapping reads, in order; use it as the scan projection."""
+    fields = []
+    for rule in mapping.values():
+        for source in rule.sources:
+            if source not in fields:
+                fields.append(source)
+    return fields
+
+class _Namespace(dict):
+    """Globals of a generated function: constants and functions it refers to by name."""
+    def bind(self, value):
+        if isinstance(value, (str, int, float, bool, type(None))):
+            return repr(value)
+        if value == [] or value == {}:
+            # A fresh literal per call, as the hand-written transforms do
+            return repr(value)
+        name = f"_c{len(self)}"
+        self[name] = value
+        return name
+
+def _get(source, default, namespace):
+    return f"get({source!r}, {namespace.bind(default)})"
+
+def _finish(source, name, namespace, mapping, caller):
+    code = compile(source, f"<mapping {name}>", "exec")
+    scope = dict(namespace)
+    exec(code, scope)
+    fn = scope[name]
+    # Pickle finds the function as <caller module>.<name>, e.g. for TransformPool workers
+    fn.__module__ = caller
+    fn.__doc__ = f"Transform generated from a mapping of {len(mapping)} target attributes."
+    fn.source = source
+    return fn
+
+def compile_mapping(mapping, translate_many=None, name="transform_item"):
+    """
+    Compile a mapping ({target attribute: rule}) into a transform function
+    that takes a deserialized source item and returns the target item.
+    The generated code reads each attribute with item.get and builds the
+    target item as one dict literal, so it runs no slower than a
+    hand-written transform. Every translated attribute of an item is
+    requested with one translate_many([(text, source_lang, target_lang), ...])
+    call, which must be given if the mapping translates anything.
+    Assign the result to a module-level name equal to name so it can be
+    pickled (e.g. by TransformPool).
+    """
+    namespace = _Namespace()
+    prologue = []
+    exprs = {}
+    requests = []
+    lists = []
+    translations = []
+
+    for target, rule in mapping.items():
+        if rule.kind == "translated":
+            source_lang, target_lang = rule.langs
+            if rule.each:
+                var = f"_v{len(lists)}"
+                prologue.append(f"    {var} = {_get(rule.sources[0], rule.default, namespace)}")
+                lists.append((var, source_lang, target_lang))
+                translations.append((target, rule, var))
+            else:
+                requests.append(f"({_get(rule.sources[0], rule.default, namespace)}, "
+                                f"{source_lang!r}, {target_lang!r})")
+                translations.append((target, rule, len(requests) - 1))
+            continue
+        if rule.kind == "field":
+            expr = _get(rule.sources[0], rule.default, namespace)
+        elif rule.kind == "constant":
+            expr = namespace.bind(rule.value)
+        elif rule.kind == "first_of":
+            *first, last = rule.sources
+            expr = "(" + " or ".join([f"get({source!r})" for source in first]
+                                     + [_get(last, rule.default, namespace)]) + ")"
+        elif rule.kind == "computed":
+            args = ", ".join(_get(source, rule.default, namespace) for source in rule.sources)
+            expr = f"{namespace.bind(rule.fn)}({args})"
+        else:
+            raise ValueError(f"{target}: unknown rule {rule.kind!r}")
+        exprs[target] = expr
+
+    if translations:
+        if translate_many is None:
+            raise ValueError("The mapping translates attributes, so translate_many is required")
+        namespace["_translate_many"] = translate_many
+        parts = [f"[{', '.join(requests)}]"] if requests else []
+        parts += [f"[(_e, {s!r}, {t!r}) for _e in {var}]" for var, s, t in lists]
+        prologue.append(f"    _t = _translate_many({' + '.join(parts)})")
+        # Single translations come first in the request list, then each list in turn
+        offsets = {}
+        start = str(len(requests))
+        for var, _, _ in lists:
+            offsets[var] = start
+            start = f"{start} + len({var})"
+        for target, rule, slot in translations:
+            if isinstance(slot, int):
+                expr = f"_t[{slot}]"
+            else:
+                expr = f"_t[{offsets[slot]}:{offsets[slot]} + len({slot})]"
+            if rule.fn is not None:
+                expr = f"{namespace.bind(rule.fn)}({expr})"
+            exprs[target] = expr
+
+    body = "\n".join(f"        {target!r}: {exprs[target]}," for target in mapping)
+    source = "\n".join([f"def {name}(item):", "    get = item.get"] + prologue
+                       + ["    return {", body, "    }", ""])
+    return _finish(source, name, namespace, mapping, sys._getframe(1).f_globals.get("__name__"))
+
+def compile_wire_mapping(mapping, name="transform_wire_item"):
+    """
+    Compile a mapping of field and constant rules into a transform over
+    DynamoDB JSON items ({"S": ...} values), copying attribute values as
+    they are without building Python objects.
+    """
+    namespace = _Namespace()
+    entries = []
+    for target, rule in mapping.items():
+        if rule.kind == "field":
+            entries.append((target, f"get({rule.sources[0]!r}, {namespace.bind(to_wire(rule.default))})"))
+        elif rule.kind == "constant":
+            entries.append((target, namespace.bind(to_wire(rule.value))))
+        else:
+            raise ValueError(f"{target}: only field and constant rules can copy DynamoDB JSON")
+    body = "\n".join(f"        {target!r}: {expr}," for target, expr in entries)
+    source = "\n".join([f"def {name}(item):", "    get = item.get", "    return {", body, "    }", ""])
+    return _finish(source, name, namespace, mapping, sys._getframe(1).f_globals.get("__name__"))
@@ -1,17 +1,31 @@
-import boto3
 import json
 from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
+from AwsClients import lazy_table
+from ContentIndex import ContentIndex
+from ItemEncoding import ItemEncoder
+from MigrationPipeline import run_migration
+from SchemaMapping import compile_mapping, computed, constant, field, source_fields
+from WireFormat import item_from_wire
+
 # AWS Configuration
 REGION = 'us-east-1'
 SOURCE_TABLE_NAME = 'dev-languageApp-spanishSections'           # Adjust to actual source table name
 TARGET_TABLE_NAME = 'juno-middleware-languageApp-ChatterBoxSections'  # Target table name
+TOTAL_SEGMENTS = 4  # Number of parallel scan workers for the source table
+WRITE_WORKERS = 4  # BatchWriteItem requests kept in flight against the target table
+CAPACITY_SHARE = 0.5  # Share of each table's read/write capacity the migration may consume
+TRANSFORM_PROCESSES = 4  # Worker processes that deserialize and transform Lessons (0 to do it in this process)
+SOURCE_EXPORT = None  # Local DynamoDB export (directory, glob or .json.gz file) to read instead of scanning
+IMPORT_OUTPUT_DIR = None  # Write ImportTable files here instead of writing to the target table (initial load)
+SKIP_UNCHANGED = True  # Skip items whose source content and transform version match the last run
+TRANSFORM_VERSION = 1  # Bump whenever transform_item changes so every item is rewritten
+COMPRESS_LARGE_FIELDS = False  # Store large Lessons documents as compressed Binary; only once the app reads them with ItemEncoding.decode_value
 
-# Initialize AWS services
-dynamodb = boto3.resource('dynamodb', region_name=REGION)
-source_table = dynamodb.Table(SOURCE_TABLE_NAME)
-target_table = dynamodb.Table(TARGET_TABLE_NAME)
+# AWS clients and tables are created on first use, from one shared session and connection pool
+source_table = lazy_table(SOURCE_TABLE_NAME, REGION)
+target_table = lazy_table(TARGET_TABLE_NAME, REGION)
 
 # Create a standard deserializer from boto3
 deserializer = TypeDeserializer()
@@ -46,6 +60,10 @@ def deserialize_item(raw_item):
     """Deserialize a raw DynamoDB item into a normal Python dict."""
     return {key: custom_deserialize(val) for key, val in raw_item.items()}
 
+def deserialize_wire_item(raw_item):
+    """Deserialize an item scanned in DynamoDB JSON, as a worker process receives it."""
+    return deserialize_item(item_from_wire(raw_item))
+
 def fix_lesson(lesson):
     """
     Remove the ImageInfo field from a lesson unless the lesson is of type PhotoList
@@ -81,46 +99,61 @@ def transform_lessons(lessons):
             fixed_lessons.append(fix_lesson(lesson))
     return json.dumps(fixed_lessons, ensure_ascii=False)
 
-def transform_item(item):
-    """
-    Build the new target item.
-    We assume each source item already has a top-level Lessons array.
-    """
-    new_item = {
-        "Identifier": item.get("Identifier", "Unknown"),
-        "Targ_Lang_Code": "ES",      # Set target language to Spanish
-        "Base_Lang_Code": "EN",  # Set base language to English
-        "Lessons": transform_lessons(item.get("Lessons", []))
-    }
-    return new_item
+# The new target item; each source item is assumed to have a top-level Lessons array
+MAPPING = {
+    "Identifier": field("Identifier", "Unknown"),
+    "Targ_Lang_Code": constant("ES"),  # Set target language to Spanish
+    "Base_Lang_Code": constant("EN"),  # Set base language to English
+    "Lessons": computed(transform_lessons, "Lessons", default=[])
+}
+
+# Every attribute transform_item reads; scans fetch only these
+SOURCE_FIELDS = source_fields(MAPPING)
+
+# JSON attributes stored as compressed Binary once they are large (see ItemEncoding)
+LARGE_JSON_FIELDS = ["Lessons"]
+
+transform_item = compile_mapping(MAPPING)
 
 def migrate_items():
     try:
         print("Starting sections migration...")
-        all_items = []
-        response = source_table.scan()
-        all_items.extend(response.get("Items", []))
-        while "LastEvaluatedKey" in response:
-            response = source_table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-            all_items.extend(response.get("Items", []))
-        print(f"Found {len(all_items)} items in the source table.\n")
-
-        # Deserialize all items
-        deserialized_items = [deserialize_item(raw) for raw in all_items]
+        # Every item is sized before it is written: large Lessons documents can be stored
+        # compressed, and items still over the limit are reported instead of failing a batch
+        encoder = ItemEncoder(TARGET_TABLE_NAME, ["Identifier"], LARGE_JSON_FIELDS if COMPRESS_LARGE_FIELDS else [])
         
-        # Optional: print one deserialized item for debugging
-        if deserialized_items:
-            print("-- Example deserialized item --")
-            print(json.dumps(deserialized_items[0], indent=2, ensure_ascii=False))
+        index = None
+        if SKIP_UNCHANGED:
+            # Re-runs only transform and write items that changed since they were last written
+            # Items that were too large to write are tried again next run
+            index = ContentIndex(TARGET_TABLE_NAME, ["Identifier"], TRANSFORM_VERSION,
+                                 failures=lambda: encoder.oversized)
         
-        # Transform and write each item to the target table.
-        with target_table.batch_writer() as batch:
-            for idx, item in enumerate(deserialized_items):
-                new_item = transform_item(item)
-                batch.put_item(Item=new_item)
-                print(f"Migrated {idx+1}/{len(deserialized_items)}: {new_item['Identifier']}")
+        def on_migrated(count, item, new_item):
+            # Optional: Print the first deserialized item for debugging.
+            if count == 1:
+                if TRANSFORM_PROCESSES:
+                    # Worker processes hand back the raw DynamoDB JSON item
+                    item = deserialize_wire_item(item)
+                print("-- Example deserialized item --")
+                print(json.dumps(item, indent=2, ensure_ascii=False, default=str))
         
-        print("\nMigration completed successfully.")
+        return run_migration(
+            source_table, target_table, transform_item, SOURCE_FIELDS, TOTAL_SEGMENTS,
+            write_workers=WRITE_WORKERS,
+            capacity_share=CAPACITY_SHARE,
+            source_export=SOURCE_EXPORT,
+            deserialize=deserialize_item,
+            wire_deserialize=deserialize_wire_item,
+            # With worker processes, items are scanned as DynamoDB JSON and parsed in the
+            # workers so the Lessons documents are only ever built there
+            scan_wire=bool(TRANSFORM_PROCESSES),
+            transform_processes=TRANSFORM_PROCESSES,
+            on_migrated=on_migrated,
+            import_output_dir=IMPORT_OUTPUT_DIR,
+            index=index,
+            encoder=encoder
+        )
     
     except ClientError as e:
         print("An error occurred:", e.response["Error"]["Message"])
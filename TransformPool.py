@@ -0,0 +1,79 @@
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from Instrumentation import metrics
+
+# Pool configuration – adjust as needed
+PROCESS_CHUNK_SIZE = 50   # Raw items sent to a worker process per task
+
+def _transform_chunk(transform, deserialize, raw_items):
+    # Runs in a worker process; per-item timings travel back with the results
+    # because the workers cannot update the parent's metrics
+    new_items, deserialize_seconds, transform_seconds = [], [], []
+    for item in raw_items:
+        if deserialize:
+            start = time.perf_counter()
+            item = deserialize(item)
+            deserialize_seconds.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        new_items.append(transform(item))
+        transform_seconds.append(time.perf_counter() - start)
+    return new_items, deserialize_seconds, transform_seconds
+
+def _collect(raw_items, future):
+    new_items, deserialize_seconds, transform_seconds = future.result()
+    for stage, timings in (("deserialize", deserialize_seconds), ("transform", transform_seconds)):
+        for seconds in timings:
+            metrics.observe(stage, seconds)
+        metrics.count(stage, len(timings))
+    return zip(raw_items, new_items)
+
+class TransformPool:
+    """
+    Process pool that deserializes and transforms chunks of raw items in
+    worker processes, so CPU-heavy transforms use every core instead of
+    sharing the scan and write threads' GIL. transform and deserialize must
+    be module-level functions so they can be pickled.
+    Workers are started with "spawn": forking a process that already runs
+    scan and write threads can deadlock on locks those threads hold.
+    """
+    def __init__(self, processes=None, chunk_size=PROCESS_CHUNK_SIZE):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def __enter__(self):
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._pool.shutdown(wait=True, cancel_futures=exc_type is not None)
+        self._pool = None
+
+    def transform(self, items, transform, deserialize=None):
+        """
+        Yield (raw_item, new_item) pairs in input order, keeping at most two
+        chunks per worker process in flight.
+        """
+        pending = deque()
+
+        def submit(chunk):
+            pending.append((chunk, self._pool.submit(_transform_chunk, transform, deserialize, chunk)))
+
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                submit(chunk)
+                chunk = []
+                if len(pending) >= self.processes * 2:
+                    yield from _collect(*pending.popleft())
+        if chunk:
+            submit(chunk)
+        while pending:
+            yield from _collect(*pending.popleft())
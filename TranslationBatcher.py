@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from Instrumentation import metrics
+
+# Batching configuration – adjust as needed
+MAX_BATCH_BYTES = 9000     # UTF-8 bytes per TranslateText request (the service allows 10,000)
+MAX_BATCH_SEGMENTS = 50    # Strings packed into one request
+MAX_SEGMENT_BYTES = 1000   # Longer strings are sent on their own
+MAX_BATCH_WAIT = 0.02      # Seconds a batch waits for more strings before it is sent
+# Strings are joined with a paragraph break, which Translate keeps; strings
+# containing a line break are never packed
+SEGMENT_DELIMITER = "\n\n"
+
+class _SplitFailed(Exception):
+    """The translated batch did not split back into one part per string."""
+
+class _Batch:
+    def __init__(self):
+        self.futures = {}
+        self.size = 0
+        self.closed = False
+
+    def fits(self, text):
+        size = len(text.encode("utf-8")) + len(SEGMENT_DELIMITER)
+        return self.size + size <= MAX_BATCH_BYTES and len(self.futures) < MAX_BATCH_SEGMENTS
+
+    def add(self, text):
+        if text not in self.futures:
+            self.futures[text] = Future()
+            self.size += len(text.encode("utf-8")) + len(SEGMENT_DELIMITER)
+        return self.futures[text]
+
+class TranslationBatcher:
+    """
+    Packs short strings translated at the same time, from any thread, into
+    one TranslateText request: the first string of a batch waits up to
+    max_wait for others with the same language pair, sends them joined by
+    SEGMENT_DELIMITER and splits the result back. If the result does not
+    split into one part per string, each string is sent on its own.
+    send(text, source_lang, target_lang) makes the actual request and returns
+    the translated text; errors it raises reach every caller of the batch.
+    """
+    def __init__(self, send, max_wait=MAX_BATCH_WAIT):
+        self.send = send
+        self.max_wait = max_wait
+        self.requests = 0
+        self.segments = 0
+        self.split_failures = 0
+        self._open = {}
+        self._cond = threading.Condition()
+
+    def _packable(self, text):
+        return (text and text == text.strip() and "\n" not in text
+                and len(text.encode("utf-8")) <= MAX_SEGMENT_BYTES)
+
+    def translate(self, text, source_lang, target_lang):
+        """Translate one string, sharing a request with other short strings when possible."""
+        if not self._packable(text):
+            with self._cond:
+                self.requests += 1
+                self.segments += 1
+            return self.send(text, source_lang, target_lang)
+
+        langs = (source_lang, target_lang)
+        with self._cond:
+            batch = self._open.get(langs)
+            leader = batch is None or not batch.fits(text)
+            if leader:
+                if batch is not None:
+                    # Full: its leader sends it now
+                    batch.closed = True
+                    self._cond.notify_all()
+                batch = self._open[langs] = _Batch()
+            future = batch.add(text)
+            if len(batch.futures) >= MAX_BATCH_SEGMENTS:
+                batch.closed = True
+                self._cond.notify_all()
+            if leader:
+                deadline = time.monotonic() + self.max_wait
+                while not batch.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch.closed = True
+                if self._open.get(langs) is batch:
+                    del self._open[langs]
+
+        if leader:
+            self._send_batch(batch, source_lang, target_lang)
+        try:
+            return future.result()
+        except _SplitFailed:
+            return self.send(text, source_lang, target_lang)
+
+    def _send_batch(self, batch, source_lang, target_lang):
+        texts = list(batch.futures)
+        with self._cond:
+            self.requests += 1
+            self.segments += len(texts)
+        try:
+            translated = self.send(SEGMENT_DELIMITER.join(texts), source_lang, target_lang)
+        except Exception as e:
+            for future in batch.futures.values():
+                future.set_exception(e)
+            return
+
+        parts = translated.split(SEGMENT_DELIMITER) if len(texts) > 1 else [translated]
+        if len(parts) != len(texts):
+            with self._cond:
+                self.split_failures += 1
+                self.requests += len(texts)
+            metrics.count("translate_split_failed")
+            for future in batch.futures.values():
+                future.set_exception(_SplitFailed())
+            return
+        for text, part in zip(texts, parts):
+            batch.futures[text].set_result(part.strip())
+
+    def summary(self):
+        return (f"{self.segments} strings in {self.requests} requests "
+                f"({self.split_failures} batches re-sent one string at a time)")
@@ -0,0 +1,171 @@
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from Instrumentation import metrics
+
+# Cache configuration – adjust as needed
+CACHE_PATH = 'translation_cache.sqlite3'  # Shared by every migration that translates
+MAX_ENTRIES = 500000     # Least recently used rows are evicted beyond this
+MEMORY_ENTRIES = 20000   # Translations kept in memory for in-run dedup
+COMMIT_EVERY = 200       # New (or reused) translations buffered before each write to the file
+
+class TranslationCache:
+    """
+    Persistent cache of translations keyed by (text, source_lang, target_lang).
+    Lookups hit an in-memory LRU first, then a SQLite file, so repeated strings
+    within a run and across re-runs never reach AWS Translate twice.
+    A read_only cache answers from the file but keeps new translations in
+    memory only (e.g. for a dry run with stubbed translations).
+    Every migration in a process shares translation_cache below; other
+    processes open the same file, so writes are batched into short
+    transactions and file errors count as misses.
+    """
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES, memory_entries=MEMORY_ENTRIES, read_only=False):
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._memory = OrderedDict()
+        self._pending = []   # Rows not yet written
+        self._touched = {}   # Keys read from disk since the last write, with their last use
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " text TEXT NOT NULL,"
+            " source_lang TEXT NOT NULL,"
+            " target_lang TEXT NOT NULL,"
+            " translated TEXT NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (text, source_lang, target_lang))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        atexit.register(self.close)
+
+    def _remember(self, key, translated):
+        self._memory[key] = translated
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text, source_lang, target_lang):
+        """Return the cached translation, or None if the text has not been translated yet."""
+        key = (text, source_lang, target_lang)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                metrics.count("translation_cache_hit")
+                return self._memory[key]
+
+            try:
+                row = self._conn.execute(
+                    "SELECT translated FROM translations WHERE text = ? AND source_lang = ? AND target_lang = ?",
+                    key
+                ).fetchone()
+            except sqlite3.Error as e:
+                # The cache only saves requests, so a file error is a miss, not a failed migration
+                self._error(e)
+                row = None
+            if row is None:
+                self.misses += 1
+                metrics.count("translation_cache_miss")
+                return None
+
+            if not self.read_only:
+                # Touched with the next write, so eviction keeps strings that are still in use
+                self._touched[key] = time.time()
+                if len(self._touched) >= COMMIT_EVERY:
+                    self._write()
+            self._remember(key, row[0])
+            self.hits += 1
+            metrics.count("translation_cache_hit")
+            return row[0]
+
+    def put(self, text, source_lang, target_lang, translated):
+        """Store a translation in memory and, with the next COMMIT_EVERY, on disk."""
+        key = (text, source_lang, target_lang)
+        with self._lock:
+            self._remember(key, translated)
+            if self.read_only:
+                return
+            self._pending.append(key + (translated, time.time()))
+            if len(self._pending) >= COMMIT_EVERY:
+                self._write()
+
+    def _write(self):
+        # New rows and touches go out in one short transaction, so the file is never
+        # left locked while translations are in flight (other processes share it)
+        pending, touched = self._pending, self._touched
+        self._pending, self._touched = [], {}
+        if not pending and not touched:
+            return
+        try:
+            with self._conn:
+                cursor = self._conn.executemany(
+                    "INSERT OR IGNORE INTO translations (text, source_lang, target_lang, translated, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    pending
+                )
+                self._size += max(cursor.rowcount, 0)
+                self._conn.executemany(
+                    "UPDATE translations SET last_used = ? WHERE text = ? AND source_lang = ? AND target_lang = ?",
+                    [(used,) + key for key, used in touched.items()]
+                )
+                if self._size > self.max_entries:
+                    self._evict()
+        except sqlite3.Error as e:
+            # Dropped rows are translated again on a later run
+            self._error(e)
+
+    def _error(self, error):
+        self.errors += 1
+        metrics.count("translation_cache_errors")
+        print(f"Translation cache error: {error}")
+
+    def _evict(self):
+        # Drop the least recently used tenth so eviction does not run on every put
+        excess = self._size - self.max_entries + self.max_entries // 10
+        self._conn.execute(
+            "DELETE FROM translations WHERE rowid IN"
+            " (SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self._size = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def flush(self):
+        """Write any translations not yet on disk."""
+        with self._lock:
+            self._write()
+
+    def summary(self):
+        """
+        Write pending translations to the file and describe the calling
+        migration's lookups (from its stage metrics, since the cache is shared).
+        """
+        self.flush()
+        text = f"{metrics.counter('translation_cache_hit')} hits, {metrics.counter('translation_cache_miss')} misses"
+        errors = metrics.counter("translation_cache_errors")
+        if errors:
+            text += f", {errors} cache file errors"
+        return text
+
+    def close(self):
+        """Flush and close the cache file; safe to call more than once."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._write()
+            self._conn.close()
+            self._conn = None
+
+# Shared by every migration in the process, so they use one connection to the file
+translation_cache = TranslationCache()
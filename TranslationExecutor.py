@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from Instrumentation import carry_metrics
+
+# Default number of translations waiting at once. Short strings share a
+# TranslateText request (TranslationBatcher), so this is more than the
+# requests actually in flight; it matches the shared client's connection pool
+MAX_TRANSLATION_WORKERS = 64
+
+class TranslationExecutor:
+    """
+    Bounded thread pool that runs translate_fn(text, source_lang, target_lang)
+    calls concurrently. Identical requests already in flight share one call.
+    """
+    def __init__(self, translate_fn, max_workers=MAX_TRANSLATION_WORKERS):
+        self.translate_fn = translate_fn
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self._in_flight = {}
+        # Re-entrant: a done callback can fire inside submit() if the call finished already
+        self._lock = threading.RLock()
+
+    def submit(self, text, source_lang, target_lang):
+        """Schedule one translation and return a Future for its result."""
+        key = (text, source_lang, target_lang)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                # Counted for the migration asking, though the pool is shared
+                future = self._pool.submit(carry_metrics(self.translate_fn), text, source_lang, target_lang)
+                self._in_flight[key] = future
+                future.add_done_callback(lambda _, key=key: self._forget(key))
+        return future
+
+    def _forget(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def translate_many(self, requests):
+        """
+        Translate a list of (text, source_lang, target_lang) tuples concurrently
+        and return the translations in the same order.
+        """
+        futures = [self.submit(*request) for request in requests]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
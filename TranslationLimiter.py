@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from Instrumentation import metrics
+
+# Translate quota configuration – adjust to the account's AWS Translate quotas
+REQUESTS_PER_SECOND = 20       # TranslateText requests per second, across every migration in the process
+CHARACTERS_PER_SECOND = 10000  # Characters sent to Translate per second
+MIN_RATE_SHARE = 0.1           # Throttling never slows the limits below this share of the configured rates
+MAX_RETRIES = 5                # Resends of a throttled request once botocore's own retries are used up
+BACKOFF_BASE = 0.5             # Seconds; doubled on every retry
+BACKOFF_CAP = 20.0             # Upper bound of a single backoff sleep
+THROTTLING_ERRORS = {"ThrottlingException", "TooManyRequestsException", "LimitExceededException",
+                     "ServiceUnavailableException"}
+
+class TokenBucket:
+    """Hands out up to rate tokens per second, with at most one second of burst."""
+    def __init__(self, rate):
+        self.max_rate = rate
+        self.rate = rate
+        self._tokens = rate
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        """Wait until amount tokens are available and take them."""
+        while True:
+            with self._lock:
+                # A request larger than the bucket waits for a full bucket instead of forever.
+                # The bucket holds at most the current rate, which throttling scales down.
+                amount = min(amount, self.rate)
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+    def scale(self, factor):
+        """Multiply the rate by factor, staying between MIN_RATE_SHARE and the configured rate."""
+        with self._lock:
+            self.rate = max(self.max_rate * MIN_RATE_SHARE, min(self.max_rate, self.rate * factor))
+
+class TranslationLimiter:
+    """
+    Paces TranslateText requests to a requests-per-second and a
+    characters-per-second budget shared by every migration in the process.
+    Throttled requests slow both budgets down (they recover as requests
+    succeed) and are resent with exponential backoff once botocore's own
+    retries are used up. Callers that fall back to the source text after an
+    error report it with fallback(), so fallbacks are counted, not silent.
+    Counts are kept per migration, in the stage metrics of the thread
+    sending the request.
+    """
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND, characters_per_second=CHARACTERS_PER_SECOND):
+        self.request_bucket = TokenBucket(requests_per_second)
+        self.character_bucket = TokenBucket(characters_per_second)
+
+    # Requests are counted in the stage metrics of the migration sending them,
+    # so each migration sharing the limiter reports its own
+    @property
+    def requests(self):
+        return metrics.counter("translate")
+
+    @property
+    def characters(self):
+        return metrics.counter("translate_characters")
+
+    @property
+    def throttled(self):
+        return metrics.counter("translate_throttled")
+
+    @property
+    def fallbacks(self):
+        return metrics.counter("translate_fallback")
+
+    def _slow_down(self):
+        self.request_bucket.scale(0.75)
+        self.character_bucket.scale(0.75)
+
+    def send(self, client, text, source_lang, target_lang):
+        """Send one TranslateText request through client and return the translated text."""
+        for attempt in range(MAX_RETRIES + 1):
+            self.request_bucket.acquire()
+            self.character_bucket.acquire(len(text))
+            try:
+                with metrics.timer("translate"):
+                    response = client.translate_text(
+                        Text=text,
+                        SourceLanguageCode=source_lang,
+                        TargetLanguageCode=target_lang
+                    )
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in THROTTLING_ERRORS or attempt == MAX_RETRIES:
+                    raise
+                metrics.count("translate_throttled")
+                self._slow_down()
+                time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+                continue
+
+            # botocore retried throttled attempts itself before this one succeeded
+            retries = response.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+            if retries:
+                metrics.count("translate_throttled", retries)
+                self._slow_down()
+            else:
+                self.request_bucket.scale(1.01)
+                self.character_bucket.scale(1.01)
+            metrics.count("translate")
+            metrics.count("translate_characters", len(text))
+            return response["TranslatedText"]
+
+    def fallback(self):
+        """Record a translation that failed and fell back to the source text."""
+        metrics.count("translate_fallback")
+
+    def summary(self):
+        """This migration's requests (see the stage metrics) against the shared limits."""
+        elapsed = max(time.monotonic() - metrics.started, 1e-9)
+        text = (f"{self.requests} requests, {self.characters} characters at {self.characters / elapsed:.0f}/s "
+                f"(limits {self.request_bucket.rate:.1f} requests/s, {self.character_bucket.rate:.0f} characters/s)")
+        if self.throttled:
+            text += f", {self.throttled} throttled attempts"
+        if self.fallbacks:
+            text += f", {self.fallbacks} translations fell back to the source text"
+        return text
+
+# Shared by every migration in the process, since they draw on one account quota
+translation_limiter = TranslationLimiter()
@@ -1,18 +1,31 @@
-import boto3
 import json
+from functools import partial
 from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
+from AwsClients import lazy_client, lazy_table
+from MigrationPipeline import run_migration
+from SchemaMapping import compile_mapping, constant, field, json_field, source_fields, translated
+from TranslationBatcher import TranslationBatcher
+from TranslationCache import translation_cache
+from TranslationExecutor import TranslationExecutor
+from TranslationLimiter import translation_limiter
+
 # AWS Configuration
 REGION = 'us-east-1'
 SOURCE_TABLE_NAME = 'dev-languageApp-spanishTriviaQuestions'  # Change this to your old table name
 TARGET_TABLE_NAME = 'juno-middleware-languageApp-ChatterBoxTriviaQuestions'  # New table name
+TOTAL_SEGMENTS = 4  # Number of parallel scan workers for the source table
+WRITE_WORKERS = 4  # BatchWriteItem requests kept in flight against the target table
+CAPACITY_SHARE = 0.5  # Share of each table's read/write capacity the migration may consume
+TRANSFORM_WORKERS = 8  # Items transformed (and translated) concurrently
+SOURCE_EXPORT = None  # Local DynamoDB export (directory, glob or .json.gz file) to read instead of scanning
+IMPORT_OUTPUT_DIR = None  # Write ImportTable files here instead of writing to the target table (initial load)
 
-# Initialize AWS services
-dynamodb = boto3.resource('dynamodb', region_name=REGION)
-translate = boto3.client('translate', region_name=REGION)
-source_table = dynamodb.Table(SOURCE_TABLE_NAME)
-target_table = dynamodb.Table(TARGET_TABLE_NAME)
+# AWS clients and tables are created on first use, from one shared session and connection pool
+translate = lazy_client('translate', REGION)
+source_table = lazy_table(SOURCE_TABLE_NAME, REGION)
+target_table = lazy_table(TARGET_TABLE_NAME, REGION)
 
 # Create a standard deserializer from boto3
 deserializer = TypeDeserializer()
@@ -42,83 +55,85 @@ def deserialize_item(raw_item):
     """Deserialize a raw DynamoDB item into a plain Python dict."""
     return {key: custom_deserialize(val) for key, val in raw_item.items()}
 
+def send_translation(text, source_lang, target_lang):
+    """Send one TranslateText request, paced to the Translate quota and retried when throttled."""
+    return translation_limiter.send(translate, text, source_lang, target_lang)
+
+# Packs short strings translated at the same time (options, answers, questions) into one request
+translation_batcher = TranslationBatcher(send_translation)
+
 def translate_text(text, source_lang, target_lang):
     """Translate text using AWS Translate."""
     if not text:
         return ""
+    cached = translation_cache.get(text, source_lang, target_lang)
+    if cached is not None:
+        return cached
     try:
-        response = translate.translate_text(
-            Text=text,
-            SourceLanguageCode=source_lang,
-            TargetLanguageCode=target_lang
-        )
-        return response["TranslatedText"]
-    except Exception as e:
-        print("Translation error for text:", text, e)
+        translated = translation_batcher.translate(text, source_lang, target_lang)
+        translation_cache.put(text, source_lang, target_lang, translated)
+        return translated
+    except ClientError as e:
+        print("Translation error for text:", text, e.response["Error"]["Message"])
+        translation_limiter.fallback()
         return text
 
-def transform_item(item):
-    """
-    Transform the old trivia question item into the new schema.
-    - The original question (assumed to be in Spanish) becomes Targ_Lang_Question.
-    - We translate the question from Spanish to English for Base_Lang_Question.
-    - Options (a list of strings in English) are stored as JSON in Base_Lang_Options.
-      They are also translated to Spanish for Targ_Lang_Options.
-    - The answer (in English) is stored as Base_Lang_Answer and translated to Spanish for Targ_Lang_Answer.
-    """
-    orig_question = item.get("question", "")
-    orig_answer = item.get("answer", "")
-    orig_options = item.get("options", [])  # Expecting a list of strings
-    
-    # Translate question from Spanish to English
-    base_question = translate_text(orig_question, "es", "en")
-    # Translate each option from English to Spanish
-    targ_options = [translate_text(opt, "en", "es") for opt in orig_options]
-    # Translate answer from English to Spanish
-    targ_answer = translate_text(orig_answer, "en", "es")
-    
-    new_item = {
-        "identifier": item.get("identifier", ""),
-        "level": item.get("level", ""),
-        "Base_Lang_Code": "EN",
-        "Base_Lang_Question": base_question,
-        "Base_Lang_Options": json.dumps(orig_options, ensure_ascii=False),
-        "Base_Lang_Answer": orig_answer,
-        "Targ_Lang_Code": "ES",
-        "Targ_Lang_Question": orig_question,
-        "Targ_Lang_Options": json.dumps(targ_options, ensure_ascii=False),
-        "Targ_Lang_Answer": targ_answer,
-        "imageURL": item.get("imageUrl", "")
-    }
-    return new_item
+# Shared pool so an item's translations (and several items' translations) run concurrently
+translation_executor = TranslationExecutor(translate_text)
+
+# The new schema:
+# - The original question (assumed to be in Spanish) becomes Targ_Lang_Question.
+# - We translate the question from Spanish to English for Base_Lang_Question.
+# - Options (a list of strings in English) are stored as JSON in Base_Lang_Options.
+#   They are also translated to Spanish, one by one, for Targ_Lang_Options.
+# - The answer (in English) is stored as Base_Lang_Answer and translated to Spanish for Targ_Lang_Answer.
+# All of an item's translations are requested at once.
+MAPPING = {
+    "identifier": field("identifier"),
+    "level": field("level"),
+    "Base_Lang_Code": constant("EN"),
+    "Base_Lang_Question": translated("question", "es", "en"),
+    "Base_Lang_Options": json_field("options", [], ensure_ascii=False),
+    "Base_Lang_Answer": field("answer"),
+    "Targ_Lang_Code": constant("ES"),
+    "Targ_Lang_Question": field("question"),
+    "Targ_Lang_Options": translated("options", "en", "es", default=[], each=True,
+                                    then=partial(json.dumps, ensure_ascii=False)),
+    "Targ_Lang_Answer": translated("answer", "en", "es"),
+    "imageURL": field("imageUrl")
+}
+
+# Every attribute transform_item reads; scans fetch only these
+SOURCE_FIELDS = source_fields(MAPPING)
+
+transform_item = compile_mapping(MAPPING, translate_many=translation_executor.translate_many)
 
 def migrate_items():
     try:
         print("Starting trivia questions migration...")
-        all_items = []
-        response = source_table.scan()
-        all_items.extend(response.get("Items", []))
-        while "LastEvaluatedKey" in response:
-            response = source_table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-            all_items.extend(response.get("Items", []))
-        print(f"Found {len(all_items)} items in the source table.\n")
         
-        # Deserialize all items
-        deserialized_items = [deserialize_item(raw) for raw in all_items]
+        def on_migrated(count, item, new_item):
+            # Optional: Print the first deserialized item for debugging.
+            if count == 1:
+                print("-- Example deserialized item --")
+                print(json.dumps(item, indent=2, ensure_ascii=False))
         
-        # Optional: Print an example item for debugging
-        if deserialized_items:
-            print("-- Example deserialized item --")
-            print(json.dumps(deserialized_items[0], indent=2, ensure_ascii=False))
-        
-        # Transform and write each item to the target table
-        with target_table.batch_writer() as batch:
-            for idx, item in enumerate(deserialized_items):
-                new_item = transform_item(item)
-                batch.put_item(Item=new_item)
-                print(f"Migrated {idx+1}/{len(deserialized_items)}: {new_item['identifier']}")
-        
-        print("\nMigration completed successfully.")
+        return run_migration(
+            source_table, target_table, transform_item, SOURCE_FIELDS, TOTAL_SEGMENTS,
+            write_workers=WRITE_WORKERS,
+            capacity_share=CAPACITY_SHARE,
+            source_export=SOURCE_EXPORT,
+            deserialize=deserialize_item,
+            wire_deserialize=deserialize_item,
+            on_migrated=on_migrated,
+            transform_workers=TRANSFORM_WORKERS,
+            import_output_dir=IMPORT_OUTPUT_DIR,
+            reports={
+                "Translation cache": translation_cache,
+                "Translate requests": translation_batcher,
+                "Translate quota": translation_limiter
+            }
+        )
     
     except ClientError as e:
         print("An error occurred:", e.response["Error"]["Message"])
@@ -1,18 +1,27 @@
-import boto3
 import json
 import decimal
 from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
+from AwsClients import lazy_table
+from MigrationPipeline import run_migration
+from SchemaMapping import compile_mapping, computed, constant, source_fields
+from WireFormat import item_from_wire
+
 # AWS Configuration – update these as needed
 REGION = 'us-east-1'
 OLD_TABLE_NAME = 'dev-languageApp-spanishUsers'  # Replace with your current table name
 NEW_TABLE_NAME = 'juno-middleware-languageApp-ChatterBoxUsers'      # New table as defined in SST
+TOTAL_SEGMENTS = 4  # Number of parallel scan workers for the source table
+WRITE_WORKERS = 4  # BatchWriteItem requests kept in flight against the target table
+CAPACITY_SHARE = 0.5  # Share of each table's read/write capacity the migration may consume
+WIRE_FORMAT = True  # Scan DynamoDB JSON and convert it in one pass instead of deserializing twice
+SOURCE_EXPORT = None  # Local DynamoDB export (directory, glob or .json.gz file) to read instead of scanning
+IMPORT_OUTPUT_DIR = None  # Write ImportTable files here instead of writing to the target table (initial load)
 
-# Initialize DynamoDB resources
-dynamodb = boto3.resource('dynamodb', region_name=REGION)
-old_table = dynamodb.Table(OLD_TABLE_NAME)
-new_table = dynamodb.Table(NEW_TABLE_NAME)
+# AWS clients and tables are created on first use, from one shared session and connection pool
+old_table = lazy_table(OLD_TABLE_NAME, REGION)
+new_table = lazy_table(NEW_TABLE_NAME, REGION)
 
 # Standard deserializer from boto3
 deserializer = TypeDeserializer()
@@ -54,73 +63,70 @@ def deserialize_item(raw_item):
     """Deserialize a raw DynamoDB item into a plain Python dict with numbers as strings."""
     return {key: custom_deserialize(val) for key, val in raw_item.items()}
 
-def transform_item(item):
+def deserialize_wire_item(raw_item):
     """
-    Transform an item from the old table to match the new schema.
-    - Set Base_Lang to "EN".
-    - Set Targ_Lang to "ES" with Current_Section and Current_Lesson as strings.
-    - Remove the old top-level Current_Section and Current_Lesson.
-    - Copy other fields unchanged, ensuring numbers are strings.
+    Single-pass equivalent of deserialize_item for DynamoDB JSON straight off
+    the wire: numbers keep their wire text instead of going through Decimal,
+    and booleans become strings as convert_to_string would make them.
     """
-    new_item = {}
-    
-    # Fields to copy unchanged
-    fields_to_copy = [
-        "Identifier", "Email", "Account_Creation_Date", "Birthday",
-        "Commitment_Level", "Country", "DailyAvailability", "Device_Information",
-        "FCM_Token", "First_Name", "Gender", "Preffered_Language", "Profile_Picture",
-        "Role", "Streak", "Subscription_End_Date", "Subscription_Start_Date",
-        "Subscription_Status", "Time_Zone", "Usage_Metrics", "User_Preferences",
-        "User_subscription_experiation", "Last_Login", "Last_Name", "Last_Streak_Change",
-        "Lives", "Location", "Motivations"
-    ]
-    for field in fields_to_copy:
-        new_item[field] = convert_to_string(item.get(field, ""))
-    
-    # Hardcode Base_Lang to "EN"
-    new_item["Base_Lang"] = "EN"
-    
-    # Hardcode Targ_Lang to "ES" with Current_Section and Current_Lesson
-    current_section = convert_to_string(item.get("Current_Section", ""))
-    current_lesson = convert_to_string(item.get("Current_Lesson", ""))
-    
+    return item_from_wire(raw_item, number=str, boolean=str)
+
+# Fields to copy unchanged
+FIELDS_TO_COPY = [
+    "Identifier", "Email", "Account_Creation_Date", "Birthday",
+    "Commitment_Level", "Country", "DailyAvailability", "Device_Information",
+    "FCM_Token", "First_Name", "Gender", "Preffered_Language", "Profile_Picture",
+    "Role", "Streak", "Subscription_End_Date", "Subscription_Start_Date",
+    "Subscription_Status", "Time_Zone", "Usage_Metrics", "User_Preferences",
+    "User_subscription_experiation", "Last_Login", "Last_Name", "Last_Streak_Change",
+    "Lives", "Location", "Motivations"
+]
+
+def targ_lang(current_section, current_lesson):
+    """Targ_Lang: "ES" with Current_Section and Current_Lesson as strings, JSON-encoded."""
     targ_lang_details = {
         "ES": {
-            "Current_Section": current_section,
-            "Current_Lesson": current_lesson
+            "Current_Section": convert_to_string(current_section),
+            "Current_Lesson": convert_to_string(current_lesson)
         }
     }
-    new_item["Targ_Lang"] = json.dumps(targ_lang_details, ensure_ascii=False, cls=DecimalEncoder)
-    
-    return new_item
+    return json.dumps(targ_lang_details, ensure_ascii=False, cls=DecimalEncoder)
+
+# The new schema:
+# - Copy FIELDS_TO_COPY unchanged, ensuring numbers are strings.
+# - Set Base_Lang to "EN".
+# - Set Targ_Lang to "ES" with Current_Section and Current_Lesson, which are
+#   no longer top-level attributes.
+MAPPING = {name: computed(convert_to_string, name) for name in FIELDS_TO_COPY}
+MAPPING["Base_Lang"] = constant("EN")
+MAPPING["Targ_Lang"] = computed(targ_lang, "Current_Section", "Current_Lesson")
+
+# Every attribute transform_item reads; scans fetch only these
+SOURCE_FIELDS = source_fields(MAPPING)
+
+transform_item = compile_mapping(MAPPING)
 
 def migrate_items():
     try:
         print("Starting users migration...")
-        all_items = []
-        response = old_table.scan()
-        all_items.extend(response.get("Items", []))
-        while "LastEvaluatedKey" in response:
-            response = old_table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-            all_items.extend(response.get("Items", []))
-        print(f"Found {len(all_items)} items in the old table.\n")
-        
-        # Deserialize items
-        deserialized_items = [deserialize_item(raw) for raw in all_items]
-        
-        # Print an example deserialized item for verification.
-        if deserialized_items:
-            print("-- Example deserialized item --")
-            print(json.dumps(deserialized_items[0], indent=2, ensure_ascii=False, cls=DecimalEncoder))
         
-        # Transform and write items to the new table.
-        with new_table.batch_writer() as batch:
-            for idx, item in enumerate(deserialized_items):
-                new_item = transform_item(item)
-                batch.put_item(Item=new_item)
-                print(f"Migrated {idx+1}/{len(deserialized_items)}: {new_item.get('Identifier')}")
+        def on_migrated(count, item, new_item):
+            # Optional: Print the first deserialized item for debugging.
+            if count == 1:
+                print("-- Example deserialized item --")
+                print(json.dumps(item, indent=2, ensure_ascii=False, cls=DecimalEncoder))
         
-        print("\nMigration completed successfully.")
+        return run_migration(
+            old_table, new_table, transform_item, SOURCE_FIELDS, TOTAL_SEGMENTS,
+            write_workers=WRITE_WORKERS,
+            capacity_share=CAPACITY_SHARE,
+            source_export=SOURCE_EXPORT,
+            deserialize=deserialize_item,
+            wire_deserialize=deserialize_wire_item,
+            scan_wire=WIRE_FORMAT,
+            on_migrated=on_migrated,
+            import_output_dir=IMPORT_OUTPUT_DIR
+        )
     
     except ClientError as e:
         print("An error occurred:", e.response["Error"]["Message"])
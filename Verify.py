@@ -0,0 +1,253 @@
+import argparse
+import base64
+import hashlib
+import importlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+from AwsClients import lazy_table
+from ItemEncoding import decode_value, is_encoded
+from MigrationPipeline import stream_items, transform_concurrently
+from Orchestrator import discover_migrations
+from ParallelScan import parallel_scan, projection
+from RateController import CapacityController
+from TransformPool import TransformPool
+from WireFormat import WireTable, item_from_wire, to_wire
+
+# Verification configuration – adjust as needed
+DEFAULT_BUCKETS = 1024   # Key-hash buckets digested on each side; only differing buckets are re-read
+MAX_EXAMPLES = 20        # Mismatching items printed per kind
+
+def source_functions(module):
+    """
+    Return (deserialize, transform, wire) turning a DynamoDB JSON source item
+    into the item the migration writes, as its export path does, so every
+    migration's source can be scanned in wire format. wire is True when the
+    transform already returns DynamoDB JSON.
+    """
+    if getattr(module, "WIRE_FORMAT", False) and hasattr(module, "transform_wire_item"):
+        return None, module.transform_wire_item, True
+    deserialize = getattr(module, "deserialize_wire_item", None) or module.deserialize_item
+    return deserialize, module.transform_item, False
+
+def table_names(module):
+    """(source, target) table names; UserMigration calls them OLD/NEW."""
+    source = getattr(module, "SOURCE_TABLE_NAME", None) or module.OLD_TABLE_NAME
+    target = getattr(module, "TARGET_TABLE_NAME", None) or module.NEW_TABLE_NAME
+    return source, target
+
+def _number(text):
+    # 1, 1.0 and 1E+0 are the same DynamoDB number
+    return str(Decimal(text).normalize())
+
+def _binary(data):
+    if isinstance(data, Binary):
+        data = data.value
+    if isinstance(data, str):
+        return data
+    return base64.b64encode(data).decode("ascii")
+
+def canonical(value):
+    """
+    A DynamoDB JSON value in one comparable form: numbers normalised, sets
+    sorted and binary values base64-encoded, so an item serialised by the
+    migration and the same item read back hash alike.
+    """
+    (kind, data), = value.items()
+    if kind == "N":
+        return {"N": _number(data)}
+    if kind == "NS":
+        return {"NS": sorted(_number(n) for n in data)}
+    if kind == "SS":
+        return {"SS": sorted(data)}
+    if kind == "B":
+        return {"B": _binary(data)}
+    if kind == "BS":
+        return {"BS": sorted(_binary(b) for b in data)}
+    if kind == "M":
+        return {"M": {k: canonical(v) for k, v in data.items()}}
+    if kind == "L":
+        return {"L": [canonical(v) for v in data]}
+    return value
+
+def _encode(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class Digest:
+    """
+    Order-independent digest of one side of a migration: items are spread
+    over buckets by a hash of their target key, and each bucket keeps an item
+    count and the XOR of its items' hashes. With keep (a set of buckets),
+    the items of those buckets are also kept, by key, for drill-down.
+    """
+    def __init__(self, key_names, buckets=DEFAULT_BUCKETS, keep=None):
+        self.key_names = key_names
+        self.buckets = buckets
+        self.counts = [0] * buckets
+        self.hashes = [0] * buckets
+        self.keep = keep
+        self.items = {}
+        self.total = 0
+
+    def add(self, wire_item):
+        item = {k: canonical(v) for k, v in wire_item.items()}
+        key = _encode({name: item.get(name) for name in self.key_names})
+        bucket = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big") % self.buckets
+        self.counts[bucket] += 1
+        self.hashes[bucket] ^= int.from_bytes(hashlib.blake2b(_encode(item), digest_size=16).digest(), "big")
+        self.total += 1
+        if self.keep is not None and bucket in self.keep:
+            self.items[key] = item
+
+    def differing_buckets(self, other):
+        return {b for b in range(self.buckets)
+                if self.counts[b] != other.counts[b] or self.hashes[b] != other.hashes[b]}
+
+def decoded(wire_item):
+    """A target item with attributes compressed by ItemEncoder compared as the text they hold."""
+    return {k: {"S": decode_value(v["B"])} if "B" in v and is_encoded(v["B"]) else v
+            for k, v in wire_item.items()}
+
+def _expected_items(module, source, segments, controller):
+    """Yield the DynamoDB JSON items the migration should have written, one per source item."""
+    deserialize, transform, wire = source_functions(module)
+    fields = getattr(module, "SOURCE_FIELDS", None) or getattr(module, "FIELDS_TO_COPY", None)
+    pages = parallel_scan(source, segments, controller=controller, **(projection(fields) if fields else {}))
+    items = stream_items(pages)
+    processes = getattr(module, "TRANSFORM_PROCESSES", 0)
+    workers = getattr(module, "TRANSFORM_WORKERS", 1)
+    if processes:
+        with TransformPool(processes) as pool:
+            for _, new_item in pool.transform(items, transform, deserialize):
+                yield new_item if wire else {k: to_wire(v) for k, v in new_item.items()}
+        return
+    if deserialize:
+        items = (deserialize(item) for item in items)
+    if workers > 1:
+        transformed = transform_concurrently(items, transform, workers)
+    else:
+        transformed = ((item, transform(item)) for item in items)
+    for _, new_item in transformed:
+        yield new_item if wire else {k: to_wire(v) for k, v in new_item.items()}
+
+def _digest_both(module, source, target, key_names, segments, share, buckets, keep=None):
+    """Digest the expected (source) and actual (target) sides concurrently."""
+    expected = Digest(key_names, buckets, keep)
+    actual = Digest(key_names, buckets, keep)
+
+    def digest_expected():
+        controller = CapacityController.for_reads(source, share, segments)
+        for item in _expected_items(module, source, segments, controller):
+            expected.add(item)
+
+    def digest_actual():
+        controller = CapacityController.for_reads(target, share, segments)
+        for page in parallel_scan(target, segments, controller=controller):
+            for item in page:
+                actual.add(decoded(item))
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="verify") as pool:
+        futures = [pool.submit(digest_expected), pool.submit(digest_actual)]
+        for future in futures:
+            future.result()
+    return expected, actual
+
+def verify(module, buckets=DEFAULT_BUCKETS, segments=None, share=None):
+    """
+    Check a migration's target table against its source: every source item
+    is run through the migration's own transform and compared with the
+    target. Both tables are scanned in parallel segments and digested per
+    key-hash bucket; only if some buckets differ are both tables read again,
+    keeping just those buckets' items, to name the items that are missing,
+    unexpected or different.
+    Translating migrations call translate_text again, so strings missing from
+    the translation cache are sent to AWS Translate.
+    """
+    source_name, target_name = table_names(module)
+    source = WireTable(lazy_table(source_name, module.REGION))
+    target = WireTable(lazy_table(target_name, module.REGION))
+    key_names = [key["AttributeName"] for key in target.key_schema]
+    segments = segments or getattr(module, "TOTAL_SEGMENTS", 1)
+    share = share or getattr(module, "CAPACITY_SHARE", 0.5)
+
+    expected, actual = _digest_both(module, source, target, key_names, segments, share, buckets)
+    differing = expected.differing_buckets(actual)
+    result = {
+        "source_table": source_name, "target_table": target_name,
+        "expected_items": expected.total, "target_items": actual.total,
+        "buckets": buckets, "differing_buckets": len(differing),
+        "missing": [], "unexpected": [], "different": []
+    }
+    if not differing:
+        return result
+
+    expected, actual = _digest_both(module, source, target, key_names, segments, share, buckets, keep=differing)
+    for key, item in expected.items.items():
+        other = actual.items.get(key)
+        if other is None:
+            result["missing"].append(json.loads(key))
+        elif other != item:
+            changed = sorted(name for name in set(item) | set(other) if item.get(name) != other.get(name))
+            result["different"].append({"key": json.loads(key), "attributes": changed})
+    result["unexpected"] = [json.loads(key) for key in actual.items if key not in expected.items]
+    return result
+
+def _key_text(wire_key):
+    return json.dumps(item_from_wire(wire_key), ensure_ascii=False, default=str)
+
+def print_result(name, result, examples=MAX_EXAMPLES):
+    status = "OK" if not result["differing_buckets"] else "MISMATCH"
+    print(f"{name}: {result['expected_items']} expected, {result['target_items']} in "
+          f"{result['target_table']}, {result['differing_buckets']}/{result['buckets']} buckets differ – {status}")
+    for kind in ("missing", "unexpected"):
+        entries = result[kind]
+        if entries:
+            print(f"  {len(entries)} {kind}:")
+            for key in entries[:examples]:
+                print(f"    {_key_text(key)}")
+    if result["different"]:
+        print(f"  {len(result['different'])} different:")
+        for entry in result["different"][:examples]:
+            print(f"    {_key_text(entry['key'])}: {', '.join(entry['attributes'])}")
+
+def main():
+    available = discover_migrations()
+    parser = argparse.ArgumentParser(description="Verify migrated tables against their source tables.")
+    parser.add_argument("migrations", nargs="*", metavar="MIGRATION",
+                        help=f"Migrations to verify (default: all of {', '.join(available)})")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS,
+                        help="Key-hash buckets compared before drilling down")
+    parser.add_argument("--segments", type=int, help="Scan segments per table (default: the migration's)")
+    parser.add_argument("--examples", type=int, default=MAX_EXAMPLES,
+                        help="Mismatching items printed per kind")
+    args = parser.parse_args()
+
+    names = args.migrations or list(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown migration(s): {', '.join(unknown)}")
+
+    failed = False
+    for name in names:
+        module = importlib.import_module(available[name])
+        start = time.monotonic()
+        try:
+            result = verify(module, args.buckets, args.segments)
+        except ClientError as e:
+            print(f"{name}: an error occurred: {e.response['Error']['Message']}")
+            failed = True
+            continue
+        print_result(name, result, args.examples)
+        print(f"  ({time.monotonic() - start:.1f}s)")
+        failed = failed or bool(result["differing_buckets"])
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from boto3.dynamodb.types import Binary, TypeSerializer
+
+from AwsClients import get_client
+
+serializer = TypeSerializer()
+
+class _Meta:
+    def __init__(self, client):
+        self.client = client
+
+class WireTable:
+    """
+    Table handle whose requests go through a plain low-level client, so scans
+    return and batch writes accept items in DynamoDB JSON ({"S": ...}) with
+    no resource-level (de)serialization. Works anywhere ParallelScan,
+    ConcurrentBatchWriter or CapacityController expect a Table; any other
+    attribute (key_schema, provisioned_throughput, ...) comes from the
+    wrapped resource Table.
+    """
+    def __init__(self, table, client=None):
+        self.table = table
+        self.name = table.name
+        self.meta = _Meta(client or get_client("dynamodb", table.meta.client.meta.region_name))
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+def from_wire(value, number=Decimal, boolean=bool):
+    """
+    Convert one AttributeValue into a Python value in a single pass.
+    Scalar numbers are built with number (Decimal by default, str to keep the
+    wire text as-is) and booleans with boolean; number sets always hold
+    Decimals like TypeDeserializer.
+    """
+    (kind, data), = value.items()
+    if kind == "S":
+        return data
+    if kind == "N":
+        return number(data)
+    if kind == "M":
+        return {k: from_wire(v, number, boolean) for k, v in data.items()}
+    if kind == "L":
+        return [from_wire(v, number, boolean) for v in data]
+    if kind == "BOOL":
+        return boolean(data)
+    if kind == "NULL":
+        return None
+    if kind == "SS":
+        return set(data)
+    if kind == "NS":
+        return {Decimal(n) for n in data}
+    if kind == "B":
+        return Binary(data)
+    if kind == "BS":
+        return {Binary(b) for b in data}
+    raise TypeError(f"Unknown DynamoDB type {kind!r}")
+
+def to_wire(value):
+    """Convert a Python value into an AttributeValue (e.g. for ExpressionAttributeValues)."""
+    return serializer.serialize(value)
+
+def item_from_wire(raw_item, number=Decimal, boolean=bool):
+    """Convert a whole DynamoDB JSON item into a plain Python dict."""
+    return {k: from_wire(v, number, boolean) for k, v in raw_item.items()}
@@ -0,0 +1,25 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TranslationLimiter import MIN_RATE_SHARE, TokenBucket
+
+def _acquires_within(bucket, amount, seconds):
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (bucket.acquire(amount), done.set()), daemon=True)
+    thread.start()
+    return done.wait(seconds)
+
+def test_large_acquire_after_scale_down():
+    bucket = TokenBucket(10000)
+    bucket.scale(0.75)
+    assert _acquires_within(bucket, 9000, 3.0)
+
+def test_large_acquire_at_minimum_rate():
+    bucket = TokenBucket(10000)
+    for _ in range(20):
+        bucket.scale(0.75)
+    assert bucket.rate == 10000 * MIN_RATE_SHARE
+    assert _acquires_within(bucket, 2000, 3.0)